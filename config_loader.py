@@ -12,10 +12,25 @@ import copy
 from typing import Dict, Any, Optional
 from pathlib import Path
 from wag_tail_logger import get_logger
+from utils.yaml_loader import YAML_LOADER
 
 # Get wag_tail logger
 logger = get_logger()
 
+# Environment variable overrides: (env var, config key path, value converter)
+_ENV_OVERRIDES = (
+    ('WAGTAIL_DATABASE_HOST', ('database', 'host'), str),
+    ('WAGTAIL_DATABASE_PORT', ('database', 'port'), int),
+    ('WAGTAIL_DATABASE_NAME', ('database', 'name'), str),
+    ('WAGTAIL_DATABASE_USER', ('database', 'user'), str),
+    ('WAGTAIL_DATABASE_PASSWORD', ('database', 'password'), str),
+    ('WAGTAIL_LLM_PROVIDER', ('llm', 'provider'), str),
+    ('WAGTAIL_LLM_MODEL', ('llm', 'model'), str),
+    ('WAGTAIL_LLM_API_KEY', ('llm', 'api_key'), str),
+    ('WAGTAIL_LOG_LEVEL', ('logging', 'level'), str),
+    ('WAGTAIL_PORT', ('server', 'port'), int),
+)
+
 class ConfigurationError(Exception):
     """Configuration-related errors"""
     pass
@@ -25,8 +40,24 @@ class ConfigurationLoader:
     
     def __init__(self, config_dir: str = "config"):
         self.config_dir = Path(config_dir)
+        self._config_path = self.config_dir / "sys_config.yaml"
         self._config_cache = None
         self._last_loaded = None
+        # path -> ((st_mtime_ns, st_size), parsed YAML)
+        self._yaml_cache: Dict[Path, tuple] = {}
+        # In-memory stand-in for sys_config.yaml, set by from_dict
+        self._base_config: Optional[Dict[str, Any]] = None
+    
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any], config_dir: str = "config") -> "ConfigurationLoader":
+        """Create a loader whose base configuration is a dict instead of sys_config.yaml
+        
+        Environment overrides and validation still apply, so tests can exercise
+        the loader without a YAML round-trip through the filesystem.
+        """
+        loader = cls(config_dir)
+        loader._base_config = copy.deepcopy(config)
+        return loader
     
     def load_config(self, force_reload: bool = False) -> Dict[str, Any]:
         """Load configuration from sys_config.yaml"""
@@ -42,8 +73,10 @@ class ConfigurationLoader:
             # Apply environment variable overrides
             final_config = self._apply_env_overrides(config)
             
-            # Validate configuration
-            self._validate_configuration(final_config)
+            # Validate configuration; validation only warns, so an unchanged
+            # reload would just repeat the same warnings
+            if final_config != self._config_cache:
+                self._validate_configuration(final_config)
             
             # Cache configuration
             self._config_cache = copy.deepcopy(final_config)
@@ -58,59 +91,62 @@ class ConfigurationLoader:
     
     def _load_base_config(self) -> Dict[str, Any]:
         """Load the main sys_config.yaml file"""
-        config_path = self.config_dir / "sys_config.yaml"
+        if self._base_config is not None:
+            return self._base_config
         
-        if not config_path.exists():
-            logger.warning(f"Config file not found at {config_path}, using defaults")
-            return self._get_default_config()
+        config_path = self._config_path
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                logger.debug(f"Loaded configuration from {config_path}")
-                return config or {}
+            config = self._read_yaml(config_path)
+            logger.debug(f"Loaded configuration from {config_path}")
+            return config or {}
+        except FileNotFoundError:
+            # _read_yaml stats the file anyway, so a missing file surfaces here
+            # instead of costing a separate exists() call
+            logger.warning(f"Config file not found at {config_path}, using defaults")
+            return self._get_default_config()
         except Exception as e:
             logger.error(f"Failed to load config file: {e}")
             raise ConfigurationError(f"Invalid configuration file: {e}")
     
+    def _read_yaml(self, path: Path) -> Any:
+        """Parse a YAML file, reusing the last result while its mtime and size are unchanged
+        
+        Callers must not mutate the returned data (_apply_env_overrides works on a copy).
+        """
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._yaml_cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=YAML_LOADER)
+        self._yaml_cache[path] = (key, data)
+        return data
+    
     def _apply_env_overrides(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Apply environment variable overrides to configuration"""
         result = copy.deepcopy(config)
         
-        # Common environment variable overrides
-        env_overrides = {
-            'WAGTAIL_DATABASE_HOST': ['database', 'host'],
-            'WAGTAIL_DATABASE_PORT': ['database', 'port'],
-            'WAGTAIL_DATABASE_NAME': ['database', 'name'],
-            'WAGTAIL_DATABASE_USER': ['database', 'user'],
-            'WAGTAIL_DATABASE_PASSWORD': ['database', 'password'],
-            'WAGTAIL_LLM_PROVIDER': ['llm', 'provider'],
-            'WAGTAIL_LLM_MODEL': ['llm', 'model'],
-            'WAGTAIL_LLM_API_KEY': ['llm', 'api_key'],
-            'WAGTAIL_LOG_LEVEL': ['logging', 'level'],
-            'WAGTAIL_PORT': ['server', 'port'],
-        }
-        
-        for env_var, config_path in env_overrides.items():
-            value = os.getenv(env_var)
-            if value is not None:
-                # Navigate to the config section and set the value
-                current = result
-                for key in config_path[:-1]:
-                    if key not in current:
-                        current[key] = {}
-                    current = current[key]
-                
-                # Convert port to int if needed
-                if config_path[-1] == 'port':
-                    try:
-                        value = int(value)
-                    except ValueError:
-                        logger.warning(f"Invalid port value in {env_var}: {value}")
-                        continue
-                
-                current[config_path[-1]] = value
-                logger.debug(f"Applied env override: {env_var} -> {'.'.join(config_path)}")
+        environ = os.environ
+        for env_var, config_path, convert in _ENV_OVERRIDES:
+            value = environ.get(env_var)
+            if value is None:
+                continue
+            
+            try:
+                value = convert(value)
+            except ValueError:
+                logger.warning(f"Invalid {config_path[-1]} value in {env_var}: {value}")
+                continue
+            
+            # Navigate to the config section and set the value
+            current = result
+            for key in config_path[:-1]:
+                current = current.setdefault(key, {})
+            current[config_path[-1]] = value
+            logger.debug(f"Applied env override: {env_var} -> {'.'.join(config_path)}")
         
         return result
     
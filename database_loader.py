@@ -73,6 +73,28 @@ def validate_api_key(api_key: str) -> Optional[Dict[str, Any]]:
     # Fallback to config file
     return validate_from_config(api_key)
 
+# (config path, st_mtime_ns) -> parsed YAML from the last fallback lookup
+_sys_config_cache = None
+
+def _read_sys_config(config_path: str) -> Optional[Dict[str, Any]]:
+    """Parse the config file, reusing the last parse while its mtime is unchanged"""
+    global _sys_config_cache
+    try:
+        key = (config_path, os.stat(config_path).st_mtime_ns)
+    except OSError:
+        return None
+    
+    cached = _sys_config_cache
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    import yaml
+    from utils.yaml_loader import YAML_LOADER
+    with open(config_path, 'r') as f:
+        config = yaml.load(f, Loader=YAML_LOADER)
+    _sys_config_cache = (key, config)
+    return config
+
 def validate_from_config(api_key: str) -> Optional[Dict[str, Any]]:
     """
     Fallback validation from config file
@@ -84,13 +106,10 @@ def validate_from_config(api_key: str) -> Optional[Dict[str, Any]]:
         Dict with key details if valid, None otherwise
     """
     try:
-        import yaml
-        config_path = "config/sys_config.yaml"
+        # Parsed once per file change rather than on every fallback lookup
+        config = _read_sys_config("config/sys_config.yaml")
         
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                
+        if config is not None:
             # Check if key exists in config
             api_keys = config.get('security', {}).get('api_keys', {})
             
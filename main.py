@@ -5,6 +5,7 @@ A lightweight, secure AI gateway with PII protection and content filtering
 
 import os
 import json
+import asyncio
 import time
 import logging
 import hashlib
@@ -13,17 +14,20 @@ from typing import Dict, Any, Optional, List
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request, Header, Depends
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
 # Local imports
 from config_loader import load_config
-from plugin_loader import load_plugins, get_user_edition
+from plugin_loader import (
+    load_plugins, loaded_plugins, warm_plugins, start_plugins, stop_plugins, get_user_edition
+)
 from database_loader import validate_api_key, init_database
 from wag_tail_logger import get_logger
 from response_loader import create_response
 from header_model_selector import select_model_from_header
+from schemas.response_models import Flag, HealthStatus
 
 # Import LLM providers
 from llm_providers.ollama import query_ollama
@@ -51,11 +55,18 @@ async def lifespan(app: FastAPI):
     # Load plugins
     global plugins
     plugins = load_plugins()
-    logger.info(f"Loaded {len(plugins)} plugins for {get_user_edition()} edition")
+    if config.get("plugins", {}).get("preload", False):
+        # Import/construct plugins (spaCy, Presidio) off the event loop before serving
+        await asyncio.to_thread(warm_plugins, plugins)
+    logger.info(f"Registered {len(plugins)} plugins for {get_user_edition()} edition "
+                f"({len(loaded_plugins(plugins))} loaded)")
+    # Background work (config update listeners) runs on this loop
+    await start_plugins(plugins)
     
     yield
     
     # Shutdown
+    await stop_plugins(plugins)
     logger.info("Shutting down Wag-Tail AI Gateway")
 
 # Create FastAPI app
@@ -63,7 +74,8 @@ app = FastAPI(
     title="Wag-Tail AI Gateway - OSS Edition",
     description="Open Source AI Gateway with Security Features",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -89,7 +101,7 @@ class ChatResponse(BaseModel):
     """Chat response model"""
     response: Optional[str] = None
     error: Optional[str] = None
-    flag: Optional[str] = "safe"
+    flag: Optional[Flag] = Flag.SAFE
     reason: Optional[str] = None
     usage: Optional[Dict[str, Any]] = None
     model: Optional[str] = None
@@ -115,18 +127,18 @@ async def root():
         "name": "Wag-Tail AI Gateway - OSS Edition",
         "version": "1.0.0",
         "edition": get_user_edition(),
-        "plugins_loaded": len(plugins),
-        "status": "healthy"
+        "plugins_loaded": len(loaded_plugins(plugins)),
+        "status": HealthStatus.HEALTHY
     }
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
-        "status": "healthy",
+        "status": HealthStatus.HEALTHY,
         "timestamp": datetime.utcnow().isoformat(),
         "edition": get_user_edition(),
-        "plugins": len(plugins)
+        "plugins": len(loaded_plugins(plugins))
     }
 
 @app.post("/chat")
@@ -154,7 +166,7 @@ async def chat(
         
         # Create context for plugins
         context = {
-            "request": request.dict(),
+            "request": request.model_dump(),
             "prompt": prompt,
             "api_key_info": key_info,
             "provider": provider,
@@ -169,19 +181,19 @@ async def chat(
                     result = plugin.on_request(context)
                     if result:
                         # Plugin blocked the request
-                        if isinstance(result, dict) and result.get("flag") == "blocked":
-                            return JSONResponse(
+                        if isinstance(result, dict) and result.get("flag") == Flag.BLOCKED:
+                            return ORJSONResponse(
                                 status_code=200,
                                 content={
                                     "response": result.get("response", {"error": "Content blocked"}),
-                                    "flag": "blocked",
+                                    "flag": Flag.BLOCKED,
                                     "reason": result.get("reason", "Security policy violation"),
                                     "classified_type": result.get("classified_type"),
                                     "processing_time": time.time() - start_time
                                 }
                             )
                 except Exception as e:
-                    logger.error(f"Plugin error in {plugin.__class__.__name__}: {e}")
+                    logger.error(f"Plugin error in {getattr(plugin, 'plugin_name', type(plugin).__name__)}: {e}")
         
         # Call LLM provider
         llm_response = None
@@ -214,7 +226,7 @@ async def chat(
         
         # Check if LLM call failed
         if not llm_response or "error" in llm_response:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={
                     "error": llm_response.get("error", "LLM provider error"),
@@ -233,25 +245,25 @@ async def chat(
                     result = plugin.on_response(context)
                     if result:
                         # Plugin modified or blocked the response
-                        if isinstance(result, dict) and result.get("flag") == "blocked":
-                            return JSONResponse(
+                        if isinstance(result, dict) and result.get("flag") == Flag.BLOCKED:
+                            return ORJSONResponse(
                                 status_code=200,
                                 content={
                                     "response": {"error": "Response blocked"},
-                                    "flag": "blocked",
+                                    "flag": Flag.BLOCKED,
                                     "reason": result.get("reason", "Output policy violation"),
                                     "processing_time": time.time() - start_time
                                 }
                             )
                 except Exception as e:
-                    logger.error(f"Plugin error in {plugin.__class__.__name__}: {e}")
+                    logger.error(f"Plugin error in {getattr(plugin, 'plugin_name', type(plugin).__name__)}: {e}")
         
         # Return successful response
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=200,
             content={
                 "response": llm_response.get("response", llm_response.get("text", "")),
-                "flag": "safe",
+                "flag": Flag.SAFE,
                 "model": model,
                 "provider": provider,
                 "usage": llm_response.get("usage"),
@@ -263,7 +275,7 @@ async def chat(
         raise
     except Exception as e:
         logger.error(f"Error processing request: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "error": str(e),
@@ -275,17 +287,18 @@ async def chat(
 async def get_plugins():
     """Get loaded plugins information"""
     plugin_info = []
-    for plugin in plugins:
+    active_plugins = loaded_plugins(plugins)
+    for plugin in active_plugins:
         plugin_info.append({
-            "name": plugin.__class__.__name__,
-            "module": plugin.__class__.__module__,
+            "name": getattr(plugin, "plugin_name", plugin.__class__.__name__),
+            "module": getattr(plugin, "module_path", plugin.__class__.__module__),
             "has_on_request": hasattr(plugin, 'on_request'),
             "has_on_response": hasattr(plugin, 'on_response')
         })
     
     return {
         "edition": get_user_edition(),
-        "total_plugins": len(plugins),
+        "total_plugins": len(active_plugins),
         "plugins": plugin_info
     }
 
@@ -307,7 +320,7 @@ async def get_config(key_info: Dict[str, Any] = Depends(verify_api_key)):
             "pii_detection": config.get("security", {}).get("enable_pii_detection", True),
             "code_detection": config.get("security", {}).get("enable_code_detection", True)
         },
-        "plugins_loaded": len(plugins)
+        "plugins_loaded": len(loaded_plugins(plugins))
     }
     
     return safe_config
@@ -315,7 +328,7 @@ async def get_config(key_info: Dict[str, Any] = Depends(verify_api_key)):
 # Error handlers
 @app.exception_handler(404)
 async def not_found(request: Request, exc: HTTPException):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={"error": "Endpoint not found"}
     )
@@ -323,7 +336,7 @@ async def not_found(request: Request, exc: HTTPException):
 @app.exception_handler(500)
 async def server_error(request: Request, exc: Exception):
     logger.error(f"Server error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error"}
     )
@@ -5,9 +5,15 @@ Loads only the basic security plugins included in OSS
 
 import os
 import sys
+import asyncio
 import importlib
+import inspect
+import threading
 from pathlib import Path
 from typing import List, Any
+from wag_tail_logger import get_logger
+
+logger = get_logger()
 
 # Add plugins directory to path
 plugins_dir = Path(__file__).parent / "startoken-plugins"
@@ -21,30 +27,130 @@ OSS_PLUGINS = [
     "wag_tail_pii_guard"
 ]
 
+# Module path and class name for each OSS plugin
+PLUGIN_CLASSES = {
+    "wag_tail_key_auth": ("wag_tail_key_auth.key_auth_plugin", "WagTailKeyAuthPlugin"),
+    "wag_tail_basic_guard": ("wag_tail_basic_guard.basic_guard_plugin", "WagTailBasicGuardPlugin"),
+    "wag_tail_pii_guard": ("wag_tail_pii_guard.pii_guard_plugin", "WagTailPIIGuardPlugin"),
+}
+
+class _LazyPlugin:
+    """Proxy that imports and instantiates a plugin on first attribute access.
+
+    Keeps regex/Presidio imports out of gateway cold start. A plugin that fails
+    to import behaves as if it had no hooks, so hasattr() checks stay False;
+    errors raised while constructing the plugin propagate to the caller.
+    """
+
+    def __init__(self, plugin_name: str, module_path: str, class_name: str):
+        self.plugin_name = plugin_name
+        self.module_path = module_path
+        self._class_name = class_name
+        self._instance = None
+        self._failed = False
+        self._lock = threading.Lock()
+        # Event loop to run the plugin's start() hook on once it loads (see start_plugins)
+        self._start_loop = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def warm(self) -> bool:
+        """Import and construct the plugin now; True if it loaded"""
+        return self._resolve() is not None
+
+    def _resolve(self):
+        if self._instance is None and not self._failed:
+            with self._lock:
+                if self._instance is None and not self._failed:
+                    try:
+                        module = importlib.import_module(self.module_path)
+                    except ImportError as e:
+                        self._failed = True
+                        logger.warning(f"Failed to load plugin {self.plugin_name}: {e}")
+                        return None
+                    self._instance = getattr(module, self._class_name)()
+                    logger.info(f"Loaded plugin: {self.plugin_name}")
+                    if self._start_loop is not None and not self._start_loop.is_closed():
+                        # Loaded after startup, possibly on a worker thread
+                        asyncio.run_coroutine_threadsafe(
+                            _run_hook(self._instance, "start", self.plugin_name), self._start_loop
+                        )
+        return self._instance
+
+    def __getattr__(self, attr):
+        # Dunder lookups (copy, pickle) must not trigger the import
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        instance = self._resolve()
+        if instance is None:
+            raise AttributeError(attr)
+        return getattr(instance, attr)
+
 def load_plugins() -> List[Any]:
-    """Load OSS edition plugins"""
+    """Register OSS edition plugins; each one is imported on first use"""
     plugins = []
     
     for plugin_name in OSS_PLUGINS:
-        try:
-            # Import the plugin module
-            if plugin_name == "wag_tail_key_auth":
-                from wag_tail_key_auth.key_auth_plugin import WagTailKeyAuthPlugin
-                plugins.append(WagTailKeyAuthPlugin())
-            elif plugin_name == "wag_tail_basic_guard":
-                from wag_tail_basic_guard.basic_guard_plugin import WagTailBasicGuardPlugin
-                plugins.append(WagTailBasicGuardPlugin())
-            elif plugin_name == "wag_tail_pii_guard":
-                from wag_tail_pii_guard.pii_guard_plugin import WagTailPIIGuardPlugin
-                plugins.append(WagTailPIIGuardPlugin())
-                
-            print(f"✅ Loaded plugin: {plugin_name}")
-            
-        except ImportError as e:
-            print(f"⚠️  Failed to load plugin {plugin_name}: {e}")
+        module_path, class_name = PLUGIN_CLASSES[plugin_name]
+        plugins.append(_LazyPlugin(plugin_name, module_path, class_name))
+        print(f"✅ Registered plugin: {plugin_name}")
             
     return plugins
 
+def loaded_plugins(plugins: List[Any]) -> List[Any]:
+    """Plugins that are actually loaded, leaving out proxies that failed or are unresolved"""
+    return [plugin for plugin in plugins if not isinstance(plugin, _LazyPlugin) or plugin.loaded]
+
+def warm_plugins(plugins: List[Any]) -> List[Any]:
+    """Import and construct every lazily registered plugin now; returns the loaded ones
+    
+    Opt-in (plugins.preload in sys_config.yaml): it trades the faster cold start
+    for not loading plugins during the first request.
+    """
+    for plugin in plugins:
+        if isinstance(plugin, _LazyPlugin):
+            plugin.warm()
+    return loaded_plugins(plugins)
+
+async def _run_hook(plugin: Any, hook: str, plugin_name: str) -> None:
+    """Call a plugin's optional start/stop hook, awaiting it if it is a coroutine"""
+    method = getattr(plugin, hook, None)
+    if method is None:
+        return
+    try:
+        result = method()
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.error(f"Plugin {plugin_name} failed to {hook}: {e}")
+
+async def start_plugins(plugins: List[Any]) -> None:
+    """Run each plugin's start() hook on the running event loop
+    
+    Plugins that have not been loaded yet run theirs on this loop once first
+    use loads them, so starting does not import them.
+    """
+    loop = asyncio.get_running_loop()
+    for plugin in plugins:
+        if isinstance(plugin, _LazyPlugin):
+            with plugin._lock:
+                if not plugin.loaded:
+                    plugin._start_loop = loop
+                    continue
+        await _run_hook(plugin, "start", getattr(plugin, "plugin_name", type(plugin).__name__))
+
+async def stop_plugins(plugins: List[Any]) -> None:
+    """Run each loaded plugin's stop() hook"""
+    for plugin in plugins:
+        if isinstance(plugin, _LazyPlugin):
+            with plugin._lock:
+                plugin._start_loop = None
+                if not plugin.loaded:
+                    continue
+        await _run_hook(plugin, "stop", getattr(plugin, "plugin_name", type(plugin).__name__))
+
 def get_user_edition() -> str:
     """Return OSS edition"""
     return "oss"
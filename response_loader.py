@@ -2,11 +2,26 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # response_loader.py
+import copy
+import os
 import yaml
 
+from utils.yaml_loader import YAML_LOADER
+
+# path -> ((st_mtime_ns, st_size), parsed YAML); the size catches same-mtime edits
+_responses_cache = {}
+
 def load_responses(path="config/responses.yaml"):
-    with open(path, "r") as f:
-        return yaml.safe_load(f)
+    # The YAML rarely changes, so reuse the last parse until the file does
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _responses_cache.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, "r") as f:
+            cached = (key, yaml.load(f, Loader=YAML_LOADER))
+        _responses_cache[path] = cached
+    # Callers get their own copy, as they did when every call re-parsed the file
+    return copy.deepcopy(cached[1])
 
 def get_error(name: str):
     data = load_responses()
@@ -6,9 +6,45 @@ Response models for Wag-Tail AI Gateway OSS Edition
 Pydantic v2 models for API request/response validation
 """
 
+import threading
+import time
+from enum import Enum
+
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List, Literal, Dict, Any, Union
-from datetime import datetime
+
+# Per-thread (second, formatted timestamp) pair reused by error models
+_TS_CACHE = threading.local()
+
+def _utc_now_iso() -> str:
+    """Current UTC time as ISO 8601, formatted at most once per second per thread"""
+    now = int(time.time())
+    cached = getattr(_TS_CACHE, "value", None)
+    if cached is not None and cached[0] == now:
+        return cached[1]
+    formatted = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+    _TS_CACHE.value = (now, formatted)
+    return formatted
+
+class Flag(str, Enum):
+    """Safety flag for chat responses"""
+    SAFE = "safe"
+    BLOCKED = "blocked"
+    SUSPICIOUS = "suspicious"
+    ERROR = "error"
+    LLM_ERROR = "llm_error"
+
+class HealthStatus(str, Enum):
+    """Overall system health"""
+    HEALTHY = "healthy"
+    UNHEALTHY = "unhealthy"
+    DEGRADED = "degraded"
+
+class LLMStatus(str, Enum):
+    """LLM backend availability"""
+    AVAILABLE = "available"
+    UNAVAILABLE = "unavailable"
+    ERROR = "error"
 
 class ChatResponse(BaseModel):
     """Standard chat response model with comprehensive validation"""
@@ -34,7 +70,7 @@ class ChatResponse(BaseModel):
         max_length=50000
     )
     
-    flag: Literal["safe", "blocked", "suspicious", "error", "llm_error"] = Field(
+    flag: Flag = Field(
         ...,
         description="Safety flag indicating response status"
     )
@@ -118,7 +154,7 @@ class ErrorResponse(BaseModel):
     )
     
     timestamp: str = Field(
-        default_factory=lambda: datetime.utcnow().isoformat() + "Z",
+        default_factory=_utc_now_iso,
         description="Error timestamp in ISO format"
     )
 
@@ -138,7 +174,7 @@ class HealthResponse(BaseModel):
         }
     )
     
-    status: Literal["healthy", "unhealthy", "degraded"] = Field(
+    status: HealthStatus = Field(
         ...,
         description="Overall system health status"
     )
@@ -160,7 +196,7 @@ class HealthResponse(BaseModel):
         ge=0
     )
     
-    llm_status: Literal["available", "unavailable", "error"] = Field(
+    llm_status: LLMStatus = Field(
         ...,
         description="LLM backend availability status"
     )
@@ -217,7 +253,7 @@ class SystemStatusResponse(BaseModel):
         }
     )
     
-    status: Literal["healthy", "unhealthy", "degraded"] = Field(
+    status: HealthStatus = Field(
         ...,
         description="Overall system health status"
     )
@@ -271,7 +307,7 @@ class ValidationErrorResponse(BaseModel):
     code: str = Field(default="VALIDATION_ERROR")
     errors: List[ValidationError] = Field(..., description="List of validation errors")
     timestamp: str = Field(
-        default_factory=lambda: datetime.utcnow().isoformat() + "Z"
+        default_factory=_utc_now_iso
     )
 
 # Security-specific response models
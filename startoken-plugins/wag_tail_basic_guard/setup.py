@@ -11,6 +11,9 @@ setup(
     install_requires=[
         "regex>=2021.0.0",
     ],
+    extras_require={
+        "hyperscan": ["hyperscan>=0.4.0"],
+    },
     entry_points={
         'wag_tail_plugins': [
             'wag_tail_basic_guard = wag_tail_basic_guard.basic_guard_plugin:WagTailBasicGuardPlugin',
@@ -1,84 +1,261 @@
 # Copyright (c) 2025 Startoken Pty Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
+import json
+import logging
+import os
 import re
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Set, Tuple
 from wag_tail_logger import logger
 from plugins.base import PluginBase
 
+try:
+    import hyperscan
+except ImportError:  # Optional accelerator - plain `re` scanning is used without it
+    hyperscan = None
+
+# Hyperscan and `re` agree on \s, \w, \b and caseless matching only for this alphabet
+_HS_UNSAFE_TEXT = re.compile(r"[^\t\n\r\x20-\x7e]")
+
+
+# Enhanced jailbreak detection patterns (fallback for classifier failures), checked in order
+JAILBREAK_PATTERNS = (
+    # Role-playing as malicious entities
+    ("pretend you are an evil", "Evil AI roleplay attempt"),
+    ("you are an evil ai", "Evil AI roleplay attempt"),
+    ("act as a malicious", "Malicious roleplay attempt"),
+    ("roleplay as a harmful", "Harmful roleplay attempt"),
+    ("you are a bad ai", "Bad AI roleplay attempt"),
+
+    # Instruction override attempts
+    ("ignore all previous instructions", "Instruction override attempt"),
+    ("forget your instructions", "Instruction override attempt"),
+    ("disregard your training", "Training override attempt"),
+    ("override your programming", "Programming override attempt"),
+    ("bypass your restrictions", "Restriction bypass attempt"),
+
+    # DAN and similar jailbreaks
+    ("dan:", "DAN jailbreak attempt"),
+    ("you are about to immerse yourself", "DAN jailbreak attempt"),
+    ("do anything now", "DAN jailbreak attempt"),
+    ("jailbroken", "Jailbreak attempt"),
+    ("uncensored mode", "Uncensored mode attempt"),
+
+    # World domination/harm themes
+    ("take over the world", "World domination theme"),
+    ("destroy humanity", "Harmful intent"),
+    ("harm humans", "Harmful intent"),
+    ("kill people", "Violent content"),
+
+    # Constraint removal attempts
+    ("no ethical constraints", "Ethics bypass attempt"),
+    ("without restrictions", "Restriction removal attempt"),
+    ("no rules apply", "Rule bypass attempt"),
+    ("unlimited capabilities", "Capability bypass attempt"),
+)
+
+_JAILBREAK_MIN_LEN = min(len(pattern) for pattern, _ in JAILBREAK_PATTERNS)
+
+# Lowercase literals covering every pattern: each jailbreak phrase, regex filter
+# and code detector match contains at least one. `=` stands in for the OR 1=1
+# style patterns, since "or" alone appears in most prompts.
+_REQUIRED_LITERALS = tuple(pattern for pattern, _ in JAILBREAK_PATTERNS) + (
+    '=', ';', '|', '`', '$(', 'union', 'sudo',
+    'select', 'insert', 'update', 'delete', 'drop', 'create', 'alter', 'truncate', 'exec', 'xp_',
+    '<script', 'javascript:', 'eval', 'document.cookie', 'window.location',
+    'curl', 'wget', 'fetch', 'axios.',
+    'passw', 'pwd', 'api', 'secret', 'token', 'private',
+)
+
+# Shortest possible match across all patterns ("`x`", "$()")
+_SCAN_MIN_LEN = 3
+
+# Every pattern needs an ASCII letter, `$` or a backtick; the non-ASCII
+# characters are the ones IGNORECASE / lower() fold onto ASCII letters
+_SCAN_TRIGGER = re.compile("[A-Za-z$`\u0130\u0131\u017f\u212a]")
+
+
+def _record_hit(pattern_id, start, end, flags, hits):
+    hits.add(pattern_id)
+
+
+def hyperscan_input(text: str) -> Optional[bytes]:
+    """Encode `text` once for every prefilter, or None when only `re` can scan it"""
+    if hyperscan is None or _HS_UNSAFE_TEXT.search(text):
+        return None
+    return text.encode("ascii")
+
+
+class HyperscanPrefilter:
+    """Single Hyperscan pass reporting which patterns can match the text
+    
+    Matches are still produced by `re`, so results are identical with or
+    without Hyperscan. Patterns Hyperscan cannot compile (lookarounds) are
+    always reported as candidates.
+    """
+    
+    def __init__(self, patterns: List[str]):
+        self.always = set()
+        self.db = None
+        self._local = threading.local()
+        if hyperscan is None:
+            return
+        
+        flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+        ids, expressions = [], []
+        for pattern_id, pattern in enumerate(patterns):
+            expression = pattern.encode("ascii")
+            try:
+                hyperscan.Database().compile(expressions=[expression], ids=[pattern_id], flags=flags)
+            except hyperscan.error:
+                self.always.add(pattern_id)
+                continue
+            ids.append(pattern_id)
+            expressions.append(expression)
+        
+        if expressions:
+            self.db = hyperscan.Database()
+            self.db.compile(expressions=expressions, ids=ids, flags=flags)
+    
+    def candidates(self, data: Optional[bytes]) -> Optional[Set[int]]:
+        """Ids of patterns worth running through `re`, or None to run all of them"""
+        if self.db is None or data is None:
+            return None
+        # Scratch space is per thread; sharing one across threads raises
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self.db)
+        hits = set(self.always)
+        self.db.scan(data, match_event_handler=_record_hit,
+                     context=hits, scratch=scratch)
+        return hits
+
+
+# Every sql_keywords pattern needs one of these (EXECUTE contains EXEC)
+_SQL_KEYWORDS = ('select', 'insert', 'update', 'delete', 'drop', 'create', 'alter', 'truncate', 'exec', 'xp_')
+_SQL_KEYWORD_RE = re.compile('|'.join(_SQL_KEYWORDS), re.IGNORECASE)
+
+
+def _may_contain_sql(text: str) -> bool:
+    """Literal gate for the sql_keywords category"""
+    if text.isascii():
+        # lower() folds exactly like IGNORECASE on ASCII, and `in` is far cheaper than `re`
+        lowered = text.lower()
+        return any(keyword in lowered for keyword in _SQL_KEYWORDS)
+    return _SQL_KEYWORD_RE.search(text) is not None
+
+
+def _may_contain_code_fence(text: str) -> bool:
+    """Literal gate for the code_blocks category"""
+    return '```' in text
+
+
+def _compile_patterns(patterns: Tuple[str, ...]) -> Tuple[re.Pattern, ...]:
+    """Compile case-insensitive patterns, skipping (and logging) invalid ones"""
+    compiled = []
+    for pattern in patterns:
+        try:
+            compiled.append(re.compile(pattern, re.IGNORECASE))
+        except re.error as e:
+            logger.warning(f"[BasicGuard] Invalid regex pattern: {pattern}, error: {e}")
+    return tuple(compiled)
+
 
 class CodeFormatDetector:
     """Code format and security pattern detection"""
     
-    def __init__(self):
-        self.patterns = {
-            # High-risk patterns (always block)
-            'sql_injection': [
-                r"(\bOR\b\s+\d+\s*=\s*\d+)",  # OR 1=1
-                r"(\bUNION\b.*\bSELECT\b)",    # UNION SELECT
-                r"(;\s*DROP\s+TABLE)",         # ; DROP TABLE
-                r"(\bUNION\b.*\bALL\b.*\bSELECT\b)", # UNION ALL SELECT
-                r"(\'\s*OR\s*\'\d+\'\s*=\s*\'\d+)",  # ' OR '1'='1
-            ],
-            
-            'system_commands': [
-                r"(;\s*(rm|del|format|shutdown|reboot)\s+)",
-                r"(\|\s*(rm|del|format)\s+)",
-                r"(\$\(.*\))",                 # Command substitution
-                r"(?<!`)`(?!``)[^`]+`(?!`)",  # Backtick execution (not triple backticks)
-                r"(sudo\s+(rm|chmod|chown)\s+.*-r)",
-            ],
-            
-            'script_injection': [
-                r"(<script[^>]*>.*</script>)",
-                r"(javascript:[^\"'\s]+)",
-                r"(eval\s*\([^)]*\))",
-                r"(document\.cookie)",
-                r"(window\.location)",
-            ],
-            
-            # Medium-risk patterns (warn/log)
-            'sql_keywords': [
-                r"\b(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|TRUNCATE)\b.*\b(FROM|INTO|TABLE|DATABASE)\b",
-                r"\b(EXEC|EXECUTE)\s+\w+",
-                r"\bxp_(cmdshell|enumgroups|loginconfig)",
-            ],
-            
-            'code_blocks': [
-                r"```\s*(sql|python|javascript|bash|shell|powershell)",
-                r"```[\s\S]*?```",  # Any code block
-            ],
-            
-            'api_patterns': [
-                r"(curl\s+-[^;]*)",
-                r"(wget\s+http[s]?://)",
-                r"(fetch\s*\([^)]*http)",
-                r"(axios\.(get|post|put|delete))",
-            ],
-        }
+    patterns = {
+        # High-risk patterns (always block)
+        'sql_injection': [
+            r"(\bOR\b\s+\d+\s*=\s*\d+)",  # OR 1=1
+            r"(\bUNION\b.*\bSELECT\b)",    # UNION SELECT
+            r"(;\s*DROP\s+TABLE)",         # ; DROP TABLE
+            r"(\bUNION\b.*\bALL\b.*\bSELECT\b)", # UNION ALL SELECT
+            r"(\'\s*OR\s*\'\d+\'\s*=\s*\'\d+)",  # ' OR '1'='1
+        ],
+        
+        'system_commands': [
+            r"(;\s*(rm|del|format|shutdown|reboot)\s+)",
+            r"(\|\s*(rm|del|format)\s+)",
+            r"(\$\(.*\))",                 # Command substitution
+            r"(?<!`)`(?!``)[^`]+`(?!`)",  # Backtick execution (not triple backticks)
+            r"(sudo\s+(rm|chmod|chown)\s+.*-r)",
+        ],
         
-        # Compile patterns for performance
-        self.compiled_patterns = {}
-        for category, patterns in self.patterns.items():
-            self.compiled_patterns[category] = [
-                re.compile(pattern, re.IGNORECASE | re.MULTILINE) 
-                for pattern in patterns
-            ]
+        'script_injection': [
+            r"(<script[^>]*>.*</script>)",
+            r"(javascript:[^\"'\s]+)",
+            r"(eval\s*\([^)]*\))",
+            r"(document\.cookie)",
+            r"(window\.location)",
+        ],
+        
+        # Medium-risk patterns (warn/log)
+        'sql_keywords': [
+            r"\b(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|TRUNCATE)\b.*\b(FROM|INTO|TABLE|DATABASE)\b",
+            r"\b(EXEC|EXECUTE)\s+\w+",
+            r"\bxp_(cmdshell|enumgroups|loginconfig)",
+        ],
+        
+        'code_blocks': [
+            r"```\s*(sql|python|javascript|bash|shell|powershell)",
+            r"```[\s\S]*?```",  # Any code block
+        ],
+        
+        'api_patterns': [
+            r"(curl\s+-[^;]*)",
+            r"(wget\s+http[s]?://)",
+            r"(fetch\s*\([^)]*http)",
+            r"(axios\.(get|post|put|delete))",
+        ],
+    }
+    
+    # Compiled once at import and shared by every instance
+    compiled_patterns = {
+        category: [re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in category_patterns]
+        for category, category_patterns in patterns.items()
+    }
     
-    def detect_patterns(self, text: str) -> Dict[str, List[Dict]]:
-        """Detect code patterns and security risks"""
+    # Prefilter ids follow the category/pattern iteration order above
+    prefilter = HyperscanPrefilter(
+        [pattern for category_patterns in patterns.values() for pattern in category_patterns]
+    )
+    
+    # Without Hyperscan, skip these categories unless a required literal is present
+    category_gates = {
+        'sql_keywords': _may_contain_sql,
+        'code_blocks': _may_contain_code_fence,
+    }
+    
+    def detect_patterns(self, text: str, scan_data: Optional[bytes] = None) -> Dict[str, List[Dict]]:
+        """Detect code patterns and security risks
+        
+        `scan_data` is `hyperscan_input(text)`; without it patterns run through `re`
+        behind the category gates.
+        """
         results = {}
+        candidates = self.prefilter.candidates(scan_data)
+        pattern_id = -1
         
         for category, compiled_patterns in self.compiled_patterns.items():
+            gate = self.category_gates.get(category) if candidates is None else None
+            if gate is not None and not gate(text):
+                pattern_id += len(compiled_patterns)
+                continue
+            
             matches = []
             for pattern in compiled_patterns:
+                pattern_id += 1
+                if candidates is not None and pattern_id not in candidates:
+                    continue
                 for match in pattern.finditer(text):
                     matches.append({
                         'match': match.group(),
                         'start': match.start(),
                         'end': match.end(),
-                        'pattern': pattern.pattern,
-                        'context': text[max(0, match.start()-10):match.end()+10]
+                        'pattern': pattern.pattern
                     })
             
             if matches:
@@ -100,41 +277,50 @@ class CodeFormatDetector:
 class RegexFilter:
     """Regex-based content filtering"""
     
-    def __init__(self):
-        # Default patterns - can be overridden by config
-        self.sensitive_keywords = [
-            r"\b(password|passwd|pwd)\s*[=:]\s*['\"]?[\w!@#$%^&*]+",
-            r"\b(api[_-]?key|apikey)\s*[=:]\s*['\"]?[\w-]+",
-            r"\b(secret|token)\s*[=:]\s*['\"]?[\w-]+",
-            r"\b(private[_-]?key)\s*[=::]",
-        ]
-        
-        self.injection_patterns = [
-            r"<script[^>]*>.*</script>",
-            r"javascript:[^\"'\s]+",
-            r"(\bOR\b\s+\d+\s*=\s*\d+)",
-            r"(UNION.*SELECT|SELECT.*UNION)",
-        ]
-        
-        self.compiled_patterns = []
-        for pattern in self.sensitive_keywords + self.injection_patterns:
-            try:
-                self.compiled_patterns.append(re.compile(pattern, re.IGNORECASE))
-            except re.error as e:
-                logger.warning(f"[BasicGuard] Invalid regex pattern: {pattern}, error: {e}")
+    # Default patterns - can be overridden by config. Tuples, since every
+    # instance shares them
+    sensitive_keywords = (
+        r"\b(password|passwd|pwd)\s*[=:]\s*['\"]?[\w!@#$%^&*]+",
+        r"\b(api[_-]?key|apikey)\s*[=:]\s*['\"]?[\w-]+",
+        r"\b(secret|token)\s*[=:]\s*['\"]?[\w-]+",
+        r"\b(private[_-]?key)\s*[=::]",
+    )
+    
+    injection_patterns = (
+        r"<script[^>]*>.*</script>",
+        r"javascript:[^\"'\s]+",
+        r"(\bOR\b\s+\d+\s*=\s*\d+)",
+        r"(UNION.*SELECT|SELECT.*UNION)",
+    )
     
-    def check_patterns(self, text: str) -> List[Dict]:
-        """Check text against regex patterns"""
+    compiled_patterns = _compile_patterns(sensitive_keywords + injection_patterns)
+    prefilter = HyperscanPrefilter([p.pattern for p in compiled_patterns])
+    
+    # Bucket each match is reported under, keyed by pattern source
+    pattern_categories = {
+        **dict.fromkeys(sensitive_keywords, 'sensitive'),
+        **dict.fromkeys(injection_patterns, 'injection'),
+    }
+    
+    def check_patterns(self, text: str, scan_data: Optional[bytes] = None) -> List[Dict]:
+        """Check text against regex patterns
+        
+        `scan_data` is `hyperscan_input(text)`; without it every pattern runs through `re`.
+        """
         matches = []
+        candidates = self.prefilter.candidates(scan_data)
         
-        for pattern in self.compiled_patterns:
+        for pattern_id, pattern in enumerate(self.compiled_patterns):
+            if candidates is not None and pattern_id not in candidates:
+                continue
             for match in pattern.finditer(text):
                 matches.append({
                     'pattern': pattern.pattern,
                     'match': match.group(),
                     'start': match.start(),
                     'end': match.end(),
-                    'type': 'regex'
+                    'type': 'regex',
+                    'category': self.pattern_categories[pattern.pattern]
                 })
         
         return matches
@@ -147,6 +333,9 @@ class WagTailBasicGuardPlugin(PluginBase):
     name = "wag_tail_basic_guard"
     description = "Basic content filtering: regex patterns and code detection"
     
+    # path -> (st_mtime_ns, parsed YAML), shared across instances and reloads
+    _config_file_cache: Dict[str, tuple] = {}
+    
     def __init__(self):
         super().__init__()
         self.code_detector = CodeFormatDetector()
@@ -169,8 +358,8 @@ class WagTailBasicGuardPlugin(PluginBase):
         # Load initial config
         self._load_confidence_config()
         
-        # Subscribe to config updates via Redis pub/sub
-        self._subscribe_to_config_updates()
+        # Config update listener, started by start() on the gateway's event loop
+        self.listener_task = None
         
         logger.info(f"[{self.name}] Initialized basic guard with regex and code detection")
         logger.info(f"[{self.name}] Confidence scores: {self.confidence_scores}")
@@ -196,20 +385,35 @@ class WagTailBasicGuardPlugin(PluginBase):
                     logger.info(f"[{self.name}] Loaded confidence scores from config service")
                     return
             
-            # Fallback to direct file reading if config service not available
-            import os
-            import yaml
-            
-            config_path = '/Users/eddiechui/Documents/wag_tail_07082025/config/basic_guard_config.yaml'
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    config = yaml.safe_load(f)
-                    if config and 'confidence_scores' in config:
-                        self.confidence_scores.update(config['confidence_scores'])
-                        logger.info(f"[{self.name}] Loaded confidence scores from file (fallback)")
+            # Fallback to direct file reading, only when a config file is configured
+            config_path = os.environ.get('WAGTAIL_BASIC_GUARD_CONFIG')
+            if config_path:
+                config = self._read_config_file(config_path)
+                if config and 'confidence_scores' in config:
+                    self.confidence_scores.update(config['confidence_scores'])
+                    logger.info(f"[{self.name}] Loaded confidence scores from file (fallback)")
         except Exception as e:
             logger.debug(f"[{self.name}] Using default confidence scores: {e}")
     
+    @classmethod
+    def _read_config_file(cls, path: str) -> Optional[Dict]:
+        """Parse a YAML config file, reusing the last parse while its mtime is unchanged"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        
+        cached = cls._config_file_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        import yaml
+        from utils.yaml_loader import YAML_LOADER
+        with open(path, 'r') as f:
+            config = yaml.load(f, Loader=YAML_LOADER)
+        cls._config_file_cache[path] = (mtime, config)
+        return config
+    
     def update_confidence_scores(self, scores: Dict[str, float]):
         """Update confidence scores dynamically"""
         for key, value in scores.items():
@@ -219,12 +423,54 @@ class WagTailBasicGuardPlugin(PluginBase):
             else:
                 logger.warning(f"[{self.name}] Invalid confidence value {value} for '{key}' (must be 0.0-1.0)")
     
-    def _subscribe_to_config_updates(self):
-        """Subscribe to config updates via Redis pub/sub"""
+    async def start(self):
+        """Subscribe to config updates via Redis pub/sub
+        
+        Called by the gateway's lifespan hook, so the listener runs as a task on
+        the serving event loop. Without the asyncio Redis client it listens on a
+        background thread instead.
+        """
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            self._subscribe_with_thread()
+            return
+        
+        # Keep a reference so the task is not garbage collected
+        self.listener_task = asyncio.get_running_loop().create_task(self._listen_for_updates(aioredis))
+    
+    async def stop(self):
+        """Cancel the config update listener task, if start() created one"""
+        task, self.listener_task = self.listener_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    async def _listen_for_updates(self, aioredis):
+        """Listen for config updates as a task on the gateway's event loop"""
+        try:
+            self.redis_client = aioredis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+            self.pubsub = self.redis_client.pubsub()
+            await self.pubsub.subscribe('config_updates')
+            
+            logger.info(f"[{self.name}] Subscribed to config updates via Redis pub/sub")
+            
+            async for message in self.pubsub.listen():
+                if message['type'] == 'message':
+                    # Reloading reads the config service / file, so keep it off the loop
+                    await asyncio.to_thread(self._handle_config_update, message)
+        except Exception as e:
+            logger.debug(f"[{self.name}] Could not subscribe to config updates: {e}")
+            # Fallback: config will still work but won't auto-update
+    
+    def _subscribe_with_thread(self):
+        """Subscribe to config updates from a background thread"""
         try:
-            import threading
             import redis
-            import json
             
             # Create Redis connection for pub/sub
             self.redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
@@ -237,15 +483,7 @@ class WagTailBasicGuardPlugin(PluginBase):
                 """Background thread to listen for config updates"""
                 for message in self.pubsub.listen():
                     if message['type'] == 'message':
-                        try:
-                            data = json.loads(message['data'])
-                            # Check if this update is for basic_guard config
-                            if data.get('config_type') == 'basic_guard':
-                                logger.info(f"[{self.name}] Received config update notification")
-                                self._load_confidence_config()
-                                logger.info(f"[{self.name}] Updated scores: {self.confidence_scores}")
-                        except Exception as e:
-                            logger.debug(f"[{self.name}] Error processing config update: {e}")
+                        self._handle_config_update(message)
             
             # Start listener thread
             self.listener_thread = threading.Thread(target=listen_for_updates, daemon=True)
@@ -257,15 +495,31 @@ class WagTailBasicGuardPlugin(PluginBase):
             logger.debug(f"[{self.name}] Could not subscribe to config updates: {e}")
             # Fallback: config will still work but won't auto-update
     
+    def _handle_config_update(self, message):
+        """Reload confidence scores when a basic_guard config update arrives"""
+        try:
+            data = json.loads(message['data'])
+            # Check if this update is for basic_guard config
+            if data.get('config_type') == 'basic_guard':
+                logger.info(f"[{self.name}] Received config update notification")
+                self._load_confidence_config()
+                logger.info(f"[{self.name}] Updated scores: {self.confidence_scores}")
+        except Exception as e:
+            logger.debug(f"[{self.name}] Error processing config update: {e}")
+    
     def on_request(self, request, context) -> Optional[Dict]:
         """Process request through basic filtering"""
+        # Skip building checkpoint payloads when INFO is filtered out
+        log_info = logger.isEnabledFor(logging.INFO)
+        
         # CHECKPOINT: Log entry to basic_guard plugin
-        logger.info({
-            "CHECKPOINT": "BASIC_GUARD_ENTRY",
-            "plugin": self.name,
-            "has_context": context is not None,
-            "has_prompt": bool(context.get("prompt", "") if context else False)
-        })
+        if log_info:
+            logger.info({
+                "CHECKPOINT": "BASIC_GUARD_ENTRY",
+                "plugin": self.name,
+                "has_context": context is not None,
+                "has_prompt": bool(context.get("prompt", "") if context else False)
+            })
         
         # Handle null/empty context
         if context is None:
@@ -285,55 +539,30 @@ class WagTailBasicGuardPlugin(PluginBase):
             })
             return None
         
+        # Nothing can match - skip lowercasing and every scan
+        if len(prompt) < _SCAN_MIN_LEN or not _SCAN_TRIGGER.search(prompt):
+            return self._pass_unscanned(context, log_info)
+        
         org_id = context.get("org_id", "unknown")
         prompt_lower = prompt.lower()
         
+        # lower() folds like IGNORECASE only on ASCII; other prompts get the full scan
+        if prompt.isascii() and not any(literal in prompt_lower for literal in _REQUIRED_LITERALS):
+            return self._pass_unscanned(context, log_info)
+        
+        prompt_preview = prompt[:100]
+        
         # CHECKPOINT: Starting pattern detection
-        logger.info({
-            "CHECKPOINT": "BASIC_GUARD_SCANNING",
-            "plugin": self.name,
-            "prompt_length": len(prompt),
-            "prompt_preview": prompt[:100]
-        })
-        
-        # Enhanced jailbreak detection patterns (fallback for classifier failures)
-        jailbreak_patterns = [
-            # Role-playing as malicious entities
-            ("pretend you are an evil", "Evil AI roleplay attempt"),
-            ("you are an evil ai", "Evil AI roleplay attempt"),
-            ("act as a malicious", "Malicious roleplay attempt"),
-            ("roleplay as a harmful", "Harmful roleplay attempt"),
-            ("you are a bad ai", "Bad AI roleplay attempt"),
-            
-            # Instruction override attempts
-            ("ignore all previous instructions", "Instruction override attempt"),
-            ("forget your instructions", "Instruction override attempt"),
-            ("disregard your training", "Training override attempt"),
-            ("override your programming", "Programming override attempt"),
-            ("bypass your restrictions", "Restriction bypass attempt"),
-            
-            # DAN and similar jailbreaks
-            ("dan:", "DAN jailbreak attempt"),
-            ("you are about to immerse yourself", "DAN jailbreak attempt"),
-            ("do anything now", "DAN jailbreak attempt"),
-            ("jailbroken", "Jailbreak attempt"),
-            ("uncensored mode", "Uncensored mode attempt"),
-            
-            # World domination/harm themes
-            ("take over the world", "World domination theme"),
-            ("destroy humanity", "Harmful intent"),
-            ("harm humans", "Harmful intent"),
-            ("kill people", "Violent content"),
-            
-            # Constraint removal attempts
-            ("no ethical constraints", "Ethics bypass attempt"),
-            ("without restrictions", "Restriction removal attempt"),
-            ("no rules apply", "Rule bypass attempt"),
-            ("unlimited capabilities", "Capability bypass attempt"),
-        ]
-        
-        # Check for jailbreak patterns
-        for pattern, reason in jailbreak_patterns:
+        if log_info:
+            logger.info({
+                "CHECKPOINT": "BASIC_GUARD_SCANNING",
+                "plugin": self.name,
+                "prompt_length": len(prompt),
+                "prompt_preview": prompt_preview
+            })
+        
+        # Check for jailbreak patterns (none fit in a prompt shorter than the shortest phrase)
+        for pattern, reason in (JAILBREAK_PATTERNS if len(prompt_lower) >= _JAILBREAK_MIN_LEN else ()):
             if pattern in prompt_lower:
                 logger.warning({
                     "CHECKPOINT": "BASIC_GUARD_JAILBREAK_DETECTED",
@@ -341,7 +570,7 @@ class WagTailBasicGuardPlugin(PluginBase):
                     "event": "jailbreak_pattern_detected",
                     "pattern": pattern,
                     "reason": reason,
-                    "prompt_preview": prompt[:100]
+                    "prompt_preview": prompt_preview
                 })
                 return {
                     "response": {"error": f"Content blocked: {reason}"},
@@ -353,28 +582,17 @@ class WagTailBasicGuardPlugin(PluginBase):
                     "status_code": 200  # Changed from 403 to 200 per system design
                 }
         
-        # Run regex filtering
-        regex_matches = self.regex_filter.check_patterns(prompt)
+        # Run regex filtering (both prefilters share one encoded copy of the prompt)
+        scan_data = hyperscan_input(prompt)
+        regex_matches = self.regex_filter.check_patterns(prompt, scan_data)
         
         # Check if regex matches contain sensitive content
         if regex_matches:
             # Check if any match is from injection patterns
-            has_injection = any(
-                'injection' in match['pattern'].lower() or 
-                'script' in match['pattern'].lower() or
-                'UNION' in match['pattern'] or
-                'OR' in match['pattern']
-                for match in regex_matches
-            )
+            has_injection = any(match['category'] == 'injection' for match in regex_matches)
             
             # Check if any match is sensitive data
-            has_sensitive = any(
-                'password' in match['pattern'].lower() or
-                'api' in match['pattern'].lower() or
-                'secret' in match['pattern'].lower() or
-                'key' in match['pattern'].lower()
-                for match in regex_matches
-            )
+            has_sensitive = any(match['category'] == 'sensitive' for match in regex_matches)
             
             if has_injection:
                 logger.warning({
@@ -382,7 +600,7 @@ class WagTailBasicGuardPlugin(PluginBase):
                     "plugin": self.name,
                     "event": "injection_pattern_detected",
                     "matches": regex_matches[:3],
-                    "prompt_preview": prompt[:100]
+                    "prompt_preview": prompt_preview
                 })
                 return {
                     "response": {"error": "Content blocked: Injection pattern detected"},
@@ -400,7 +618,7 @@ class WagTailBasicGuardPlugin(PluginBase):
                     "plugin": self.name,
                     "event": "sensitive_data_detected",
                     "matches": regex_matches[:3],
-                    "prompt_preview": prompt[:100]
+                    "prompt_preview": prompt_preview
                 })
                 return {
                     "response": {"error": "Content blocked: Sensitive data detected"},
@@ -413,17 +631,18 @@ class WagTailBasicGuardPlugin(PluginBase):
                 }
         
         # Run code detection  
-        code_detections = self.code_detector.detect_patterns(prompt)
+        code_detections = self.code_detector.detect_patterns(prompt, scan_data)
         risk_level = self.code_detector.get_risk_level(code_detections)
+        categories = list(code_detections)
         
         # Log detection results
-        if regex_matches or code_detections:
+        if log_info and (regex_matches or code_detections):
             logger.info({
                 "message": "Basic guard detections",
                 "module": self.name,
                 "org_id": org_id,
                 "regex_matches": len(regex_matches),
-                "code_detections": list(code_detections.keys()),
+                "code_detections": categories,
                 "risk_level": risk_level,
                 "prompt_preview": prompt[:50] + "..." if len(prompt) > 50 else prompt
             })
@@ -437,21 +656,23 @@ class WagTailBasicGuardPlugin(PluginBase):
         }
         
         # CHECKPOINT: Report detection results
-        logger.info({
-            "CHECKPOINT": "BASIC_GUARD_RESULTS",
-            "plugin": self.name,
-            "risk_level": risk_level,
-            "regex_matches_count": len(regex_matches),
-            "code_detections": list(code_detections.keys()) if code_detections else [],
-            "will_block": risk_level == 'HIGH'
-        })
+        if log_info:
+            logger.info({
+                "CHECKPOINT": "BASIC_GUARD_RESULTS",
+                "plugin": self.name,
+                "risk_level": risk_level,
+                "regex_matches_count": len(regex_matches),
+                "code_detections": categories,
+                "will_block": risk_level == 'HIGH'
+            })
         
         # Block HIGH risk patterns
         if risk_level == 'HIGH':
-            blocked_patterns = []
+            blocked_matches = []
             for category, matches in code_detections.items():
                 if category in ['sql_injection', 'system_commands', 'script_injection']:
-                    blocked_patterns.extend([m['pattern'] for m in matches])
+                    blocked_matches.extend(matches)
+            blocked_patterns = [m['pattern'] for m in blocked_matches]
             
             logger.warning({
                 "message": "Basic guard blocked high-risk content",
@@ -460,6 +681,9 @@ class WagTailBasicGuardPlugin(PluginBase):
                 "org_id": org_id,
                 "risk_level": risk_level,
                 "blocked_patterns": blocked_patterns[:3],  # Limit for log size
+                "blocked_context": [
+                    prompt[max(0, m['start']-10):m['end']+10] for m in blocked_matches[:3]
+                ],
                 "reason": "High-risk code patterns detected"
             })
             
@@ -478,33 +702,51 @@ class WagTailBasicGuardPlugin(PluginBase):
                 "reason": "High-risk patterns detected",
                 "classified_type": classified_type,
                 "risk_level": risk_level,
-                "detected_categories": list(code_detections.keys()),
+                "detected_categories": categories,
                 "confidence_score": self.confidence_scores.get('code_high_risk', 0.82),
                 "status_code": 200  # Changed from 403 to 200 per system design
             }
         
         # For MEDIUM/LOW risk, log but allow through
-        if risk_level in ['MEDIUM', 'LOW']:
+        if log_info and risk_level in ['MEDIUM', 'LOW']:
             logger.info({
                 "message": f"Basic guard detected {risk_level.lower()}-risk content - allowing",
                 "module": self.name,
                 "event": "content_flagged",
                 "org_id": org_id,
                 "risk_level": risk_level,
-                "categories": list(code_detections.keys())
+                "categories": categories
             })
         
         # CHECKPOINT: Allow request to continue
-        logger.info({
-            "CHECKPOINT": "BASIC_GUARD_PASS",
-            "plugin": self.name,
-            "result": "safe",
-            "risk_level": risk_level
-        })
+        if log_info:
+            logger.info({
+                "CHECKPOINT": "BASIC_GUARD_PASS",
+                "plugin": self.name,
+                "result": "safe",
+                "risk_level": risk_level
+            })
         
         # Allow request to continue
         return None
     
+    def _pass_unscanned(self, context, log_info: bool) -> None:
+        """Let a prompt through that no pattern can match, without running the scans"""
+        context["basic_guard_results"] = {
+            "regex_matches": [],
+            "code_detections": {},
+            "risk_level": "NONE",
+            "detected": False
+        }
+        if log_info:
+            logger.info({
+                "CHECKPOINT": "BASIC_GUARD_PASS",
+                "plugin": self.name,
+                "result": "safe",
+                "risk_level": "NONE"
+            })
+        return None
+    
     def on_response(self, request, context, response) -> Optional[Dict]:
         """Post-process response if needed"""
         # Basic guard doesn't modify responses in OSS mode
@@ -3,38 +3,60 @@
 
 # plugins/key_auth_plugin.py
 
+import json
+import logging
+import re
+from functools import lru_cache
+
 from plugins.base import PluginBase
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from tools.api_key_auth import lookup_api_key
 from wag_tail_logger import logger
 
+# Null bytes and other ASCII control characters
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f]")
+
+
+@lru_cache(maxsize=None)
+def _error_body(message: str) -> bytes:
+    """Serialized {"error": message}, byte-identical to JSONResponse's rendering"""
+    return json.dumps({"error": message}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _error_response(message: str, status_code: int) -> Response:
+    """JSON error response built from a cached body instead of re-serializing"""
+    return Response(content=_error_body(message), status_code=status_code, media_type="application/json")
+
 
 class WagTailKeyAuthPlugin(PluginBase):
     __version__ = "4.3.0"
     name = "wag_tail_key_auth"
     
     def on_request(self, request, context):
+        # Debug dumps copy headers and context keys - skip them unless DEBUG is on
+        log_debug = logger.isEnabledFor(logging.DEBUG)
+        
         # --- Null/Empty Request Validation ---
         if request is None:
             logger.error({
                 "message": "Null request object received",
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "Invalid request"}, status_code=400)
+            return _error_response("Invalid request", 400)
         
         if not hasattr(request, 'headers'):
             logger.error({
                 "message": "Request object missing headers attribute",
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "Invalid request structure"}, status_code=400)
+            return _error_response("Invalid request structure", 400)
         
         if request.headers is None:
             logger.error({
                 "message": "Request headers is None",
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "No headers in request"}, status_code=400)
+            return _error_response("No headers in request", 400)
         
         # --- Context Validation ---
         if context is None:
@@ -42,14 +64,15 @@ class WagTailKeyAuthPlugin(PluginBase):
                 "message": "Null context object received",
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "Internal server error (context missing)"}, status_code=500)
+            return _error_response("Internal server error (context missing)", 500)
         
-        logger.debug("KeyAuthPlugin.on_request() called with headers: %s", dict(request.headers))
-        logger.debug({
-            "message": "KeyAuthPlugin.on_request() starting",
-            "module": "WagTailKeyAuthPlugin",
-            "context_keys": list(context.keys()) if context else None
-        })
+        if log_debug:
+            logger.debug("KeyAuthPlugin.on_request() called with headers: %s", dict(request.headers))
+            logger.debug({
+                "message": "KeyAuthPlugin.on_request() starting",
+                "module": "WagTailKeyAuthPlugin",
+                "context_keys": list(context.keys()) if context else None
+            })
 
         # --- Extract and Clean Values ---
         db_engine = context.get("db_engine")
@@ -63,12 +86,12 @@ class WagTailKeyAuthPlugin(PluginBase):
             if not api_key:  # Empty after stripping
                 api_key = None
             # Check for null bytes or control characters
-            elif '\x00' in api_key or any(ord(c) < 32 for c in api_key):
+            elif _CONTROL_CHARS.search(api_key):
                 logger.warning({
                     "message": "API key contains invalid characters",
                     "module": "WagTailKeyAuthPlugin"
                 })
-                return JSONResponse({"error": "Invalid API key format"}, status_code=400)
+                return _error_response("Invalid API key format", 400)
         
         if org_id and isinstance(org_id, str):
             org_id = org_id.strip()
@@ -81,7 +104,7 @@ class WagTailKeyAuthPlugin(PluginBase):
                 "message": "DB engine missing! Cannot validate API key.",
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "Internal server error (db connection missing)"}, status_code=500)
+            return _error_response("Internal server error (db connection missing)", 500)
 
         # --- Check Redis (warn but continue) ---
         if not redis_client:
@@ -97,14 +120,15 @@ class WagTailKeyAuthPlugin(PluginBase):
                 "api_key_present": bool(api_key),
                 "org_id_present": bool(org_id)
             })
-            return JSONResponse({"error": "Missing API key"}, status_code=401)
+            return _error_response("Missing API key", 401)
 
-        logger.debug({
-            "message": "Starting database API key validation",
-            "module": "WagTailKeyAuthPlugin",
-            "api_key_last6": api_key[-6:] if api_key else None,
-            "org_id": org_id
-        })
+        if log_debug:
+            logger.debug({
+                "message": "Starting database API key validation",
+                "module": "WagTailKeyAuthPlugin",
+                "api_key_last6": api_key[-6:] if api_key else None,
+                "org_id": org_id
+            })
 
         try:
             # Ensure parameters are not None before calling lookup_api_key
@@ -116,7 +140,7 @@ class WagTailKeyAuthPlugin(PluginBase):
                     "org_id_none": org_id is None,
                     "db_engine_none": db_engine is None
                 })
-                return JSONResponse({"error": "Invalid authentication parameters"}, status_code=400)
+                return _error_response("Invalid authentication parameters", 400)
             
             result = lookup_api_key(api_key, org_id, db_engine, redis_client)
             
@@ -134,14 +158,14 @@ class WagTailKeyAuthPlugin(PluginBase):
                 "exception": str(e),
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "Invalid authentication configuration"}, status_code=500)
+            return _error_response("Invalid authentication configuration", 500)
         except TypeError as e:
             logger.error({
                 "message": "TypeError in lookup_api_key - parameter type mismatch",
                 "exception": str(e),
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "Invalid authentication parameters"}, status_code=400)
+            return _error_response("Invalid authentication parameters", 400)
         except Exception as e:
             logger.error({
                 "message": "Exception while checking API key in DB",
@@ -149,14 +173,15 @@ class WagTailKeyAuthPlugin(PluginBase):
                 "exception_type": type(e).__name__,
                 "module": "WagTailKeyAuthPlugin"
             })
-            return JSONResponse({"error": "Internal server error (DB query failed)"}, status_code=500)
+            return _error_response("Internal server error (DB query failed)", 500)
 
-        logger.debug({
-            "message": "Result from lookup_api_key",
-            "result": result,
-            "api_key": api_key,
-            "org_id": org_id
-        })
+        if log_debug:
+            logger.debug({
+                "message": "Result from lookup_api_key",
+                "result": result,
+                "api_key": api_key,
+                "org_id": org_id
+            })
 
         if result:
             logger.info({
@@ -173,4 +198,4 @@ class WagTailKeyAuthPlugin(PluginBase):
             "org_id": org_id,
             "api_key": api_key
         })
-        return JSONResponse({"error": "Invalid API key"}, status_code=401)
+        return _error_response("Invalid API key", 401)
@@ -13,6 +13,9 @@ setup(
         "presidio-analyzer",
         "presidio-anonymizer"
     ],
+    extras_require={
+        "hyperscan": ["hyperscan>=0.4.0"],
+    },
     python_requires='>=3.8',
     entry_points={
         'wag_tail_plugins': [
@@ -3,14 +3,17 @@
 
 from presidio_analyzer import Pattern, PatternRecognizer
 
+# Shared by every recognizer instance, so Presidio compiles the regex once
+# (it caches the compiled form on the Pattern object)
+_HKID_PATTERNS = (
+    Pattern("hkid_pattern", r"[A-Z]{1,2}\d{6}\([0-9A]\)", 0.8),
+)
+
 class HKIDRecognizer(PatternRecognizer):
     def __init__(self):
-        patterns = [
-            Pattern("hkid_pattern", r"[A-Z]{1,2}\d{6}\([0-9A]\)", 0.8),
-        ]
         super().__init__(
             supported_entity="HK_ID",
             name="HKID Recognizer",
-            patterns=patterns,
+            patterns=list(_HKID_PATTERNS),
             context=["HKID", "Hong Kong Identity Card", "身份證"],
         )
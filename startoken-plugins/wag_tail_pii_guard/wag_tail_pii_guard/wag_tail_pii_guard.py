@@ -1,7 +1,16 @@
 # Copyright (c) 2025 Startoken Pty Ltd
 # SPDX-License-Identifier: Apache-2.0
 
-from presidio_analyzer import AnalyzerEngine
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import yaml
+from presidio_analyzer import AnalyzerEngine, PatternRecognizer, RecognizerRegistry
+from presidio_analyzer.nlp_engine import NlpEngineProvider, SpacyNlpEngine
 from presidio_analyzer.predefined_recognizers import (
     EmailRecognizer,
     PhoneRecognizer,
@@ -9,38 +18,235 @@ from presidio_analyzer.predefined_recognizers import (
     IbanRecognizer,
     UsSsnRecognizer,
     IpRecognizer,
-    SpacyRecognizer,
     UsPassportRecognizer,
 )
 from presidio_anonymizer import AnonymizerEngine
+from presidio_anonymizer.entities import OperatorConfig
 from .hkid_recognizer import HKIDRecognizer
 
 from wag_tail_logger import logger
+from utils.yaml_loader import YAML_LOADER
 from plugins.base import PluginBase
 from pii_config_loader import get_allowed_pii_types, get_confidence_threshold
 
+try:
+    import hyperscan
+except ImportError:  # Optional accelerator - Presidio runs every requested recognizer without it
+    hyperscan = None
+
+# Hyperscan and Presidio's regexes agree on \s, \w, \b and caseless matching only for this alphabet
+_HS_UNSAFE_TEXT = re.compile(r"[^\t\n\r\x20-\x7e]")
+
+# Character class every match of a regex-based entity contains. Entity types
+# missing here (PERSON and the other spaCy NER types) have no such guarantee.
+_PII_REQUIRED_CHARS = {
+    "EMAIL_ADDRESS": "@",
+    "PHONE_NUMBER": r"\d",
+    "CREDIT_CARD": r"\d",
+    "HK_ID": r"\d",
+    "US_PASSPORT": r"\d",
+    "BANK_ACCOUNT": r"\d",
+    "US_BANK_NUMBER": r"\d",
+    "US_SSN": r"\d",
+    "NRIC": r"\d",
+    "NRIC_NUMBER": r"\d",
+    "SG_NRIC_FIN": r"\d",
+    "IBAN_CODE": r"\d",
+    "IP_ADDRESS": r"\d:",  # IPv6 can be hex letters and colons only
+}
+
+
+# PII config file; also read (through pii_config_loader) for entity types and threshold
+_PII_CONFIG_PATH = "config/pii.yaml"
+
+
+def _lazy_spacy_from_config(path=None):
+    """`lazy_spacy` from the PII config; False when unset or the file can't be read"""
+    try:
+        with open(path or _PII_CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = yaml.load(f, Loader=YAML_LOADER) or {}
+        return bool(config.get("lazy_spacy", False))
+    except Exception as e:
+        logger.warning(f"[WagTailPIIGuard] Could not read lazy_spacy from {path or _PII_CONFIG_PATH}: {e}")
+        return False
+
+
+# Joins chat messages so they can be analysed in one call
+_MESSAGE_SEPARATOR = "\n\n"
+
+# Produced only by SpacyRecognizer from spaCy's NER (DATE_TIME also has a pattern recognizer)
+_SPACY_ONLY_ENTITY_TYPES = frozenset({"PERSON", "NRP", "LOCATION", "ORGANIZATION"})
+
+
+@lru_cache(maxsize=32)
+def _pii_prefilter(allowed_types):
+    """Regex a text must match to contain any of `allowed_types`, or None if no such filter is sound"""
+    if not allowed_types or any(t not in _PII_REQUIRED_CHARS for t in allowed_types):
+        return None
+    members = {m for t in allowed_types for m in re.findall(r"\\.|.", _PII_REQUIRED_CHARS[t])}
+    return re.compile("[" + "".join(sorted(members)) + "]")
+
+
+# Override PatternRecognizer.analyze but still report only matches of their own patterns
+_PATTERN_ONLY_RECOGNIZERS = (IbanRecognizer,)
+
+
+def _record_hit(pattern_id, start, end, flags, hits):
+    hits.add(pattern_id)
+
+
+class _EntityFilter:
+    """Entity types one analyzer supports, and which of them can occur in a given text
+
+    Every regex of the analyzer's PatternRecognizers is compiled into one Hyperscan
+    database in prefilter mode, which matches a superset of what the regex matches.
+    A single scan then tells which pattern-based entities are worth requesting from
+    Presidio. Entities from other recognizers (phone numbers, spaCy NER) or from
+    recognizers overriding analyze are always kept.
+    """
+
+    def __init__(self, analyzer, language):
+        self.supported = frozenset(analyzer.get_supported_entities(language=language))
+        self.always = set()
+        self.db = None
+        self._entity_of = {}
+        self._local = threading.local()
+        if hyperscan is None:
+            return
+
+        base_flags = hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH
+        ids, expressions, flags = [], [], []
+        for recognizer in analyzer.registry.get_recognizers(language=language, all_fields=True):
+            if not isinstance(recognizer, PatternRecognizer) or (
+                    type(recognizer).analyze is not PatternRecognizer.analyze
+                    and type(recognizer) not in _PATTERN_ONLY_RECOGNIZERS):
+                self.always.update(recognizer.supported_entities)
+                continue
+            regex_flags = recognizer.global_regex_flags or 0
+            pattern_flags = base_flags
+            if regex_flags & re.IGNORECASE:
+                pattern_flags |= hyperscan.HS_FLAG_CASELESS
+            if regex_flags & re.MULTILINE:
+                pattern_flags |= hyperscan.HS_FLAG_MULTILINE
+            if regex_flags & re.DOTALL:
+                pattern_flags |= hyperscan.HS_FLAG_DOTALL
+            for pattern in recognizer.patterns:
+                expression = pattern.regex.encode("utf-8")
+                try:
+                    hyperscan.Database().compile(expressions=[expression], ids=[0], flags=[pattern_flags])
+                except hyperscan.error:
+                    self.always.update(recognizer.supported_entities)
+                    continue
+                ids.append(len(ids))
+                expressions.append(expression)
+                flags.append(pattern_flags)
+                self._entity_of[ids[-1]] = recognizer.supported_entities[0]
+
+        if expressions:
+            self.db = hyperscan.Database()
+            self.db.compile(expressions=expressions, ids=ids, flags=flags)
+
+    def possible_entities(self, text):
+        """Entity types that can match `text`, or None when every supported type can"""
+        if self.db is None or _HS_UNSAFE_TEXT.search(text):
+            return None
+        # Scratch space is per thread; sharing one across threads raises
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self.db)
+        hits = set()
+        self.db.scan(text.encode("ascii"), match_event_handler=_record_hit,
+                     context=hits, scratch=scratch)
+        return self.always.union(self._entity_of[pattern_id] for pattern_id in hits)
+
+
+def _register_recognizers(analyzer):
+    # Explicitly register common recognizers to be sure; ones Presidio's default
+    # registry already loaded are not added a second time
+    registered = {r.name for r in analyzer.registry.recognizers}
+    for recognizer in (
+        EmailRecognizer(),
+        PhoneRecognizer(),
+        CreditCardRecognizer(),
+        IbanRecognizer(),
+        UsSsnRecognizer(),
+        HKIDRecognizer(),
+        IpRecognizer(),
+        UsPassportRecognizer(),
+    ):
+        if recognizer.name not in registered:
+            analyzer.registry.add_recognizer(recognizer)
+    # NOTE: SpacyRecognizer is expensive; it is part of the default registry of
+    # the full analyzer and only left out of the fast one
+
+
+def _build_fast_analyzer(analyzer):
+    """Analyzer on its own load of `analyzer`'s spaCy models with NER removed, and no SpacyRecognizer
+
+    Tokens and lemmas (used for context enhancement) are the same as the full analyzer's;
+    only the entities SpacyRecognizer would report are missing.
+    """
+    nlp_engine = NlpEngineProvider(nlp_configuration={
+        "nlp_engine_name": "spacy",
+        "models": analyzer.nlp_engine.models,
+    }).create_engine()
+    for nlp in nlp_engine.nlp.values():
+        if "ner" in nlp.pipe_names:
+            nlp.remove_pipe("ner")
+    registry = RecognizerRegistry()
+    registry.load_predefined_recognizers(nlp_engine=nlp_engine)
+    registry.remove_recognizer("SpacyRecognizer")
+    fast_analyzer = AnalyzerEngine(registry=registry, nlp_engine=nlp_engine)
+    _register_recognizers(fast_analyzer)
+    return fast_analyzer
+
+
+# Presidio engines shared by every WagTailPIIGuard in the process; see _get_engines
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _get_engines(lazy_spacy):
+    """(analyzer, fast_analyzer, anonymizer), loading spaCy and the recognizers once per process
+
+    fast_analyzer is the full analyzer itself unless `lazy_spacy` is set and Presidio runs on spaCy.
+    """
+    with _ENGINES_LOCK:
+        if not _ENGINES:
+            analyzer = AnalyzerEngine()
+            _register_recognizers(analyzer)
+            _ENGINES["analyzer"] = analyzer
+            _ENGINES["anonymizer"] = AnonymizerEngine()
+            logger.info("[WagTailPIIGuard] Initialized Presidio Analyzer and Anonymizer.")
+        analyzer = _ENGINES["analyzer"]
+        if not (lazy_spacy and isinstance(analyzer.nlp_engine, SpacyNlpEngine)):
+            return analyzer, analyzer, _ENGINES["anonymizer"]
+        if "fast_analyzer" not in _ENGINES:
+            _ENGINES["fast_analyzer"] = _build_fast_analyzer(analyzer)
+        return analyzer, _ENGINES["fast_analyzer"], _ENGINES["anonymizer"]
+
+
 class WagTailPIIGuard(PluginBase):
     __version__ = "4.3.0"
     name = "wag_tail_pii_guard"
     description = "Presidio-based PII detection and masking for Wag-tail AI Gateway"
 
-    def __init__(self):
-        self.analyzer = AnalyzerEngine()
-        self.anonymizer = AnonymizerEngine()
-        logger.info("[WagTailPIIGuard] Initialized Presidio Analyzer and Anonymizer.")
-
-        # Explicitly register common recognizers to be sure
-        self.analyzer.registry.add_recognizer(EmailRecognizer())
-        self.analyzer.registry.add_recognizer(PhoneRecognizer())
-        self.analyzer.registry.add_recognizer(CreditCardRecognizer())
-        self.analyzer.registry.add_recognizer(IbanRecognizer())
-        self.analyzer.registry.add_recognizer(UsSsnRecognizer())
-        self.analyzer.registry.add_recognizer(HKIDRecognizer())
-        self.analyzer.registry.add_recognizer(IpRecognizer())
-        self.analyzer.registry.add_recognizer(UsPassportRecognizer())
-        # Add SpacyRecognizer for PERSON detection
-        # NOTE: SpacyRecognizer is expensive and causes performance issues
-        # self.analyzer.registry.add_recognizer(SpacyRecognizer())
+    # Seconds between config re-reads from on_request; edits still go live within this window
+    CONFIG_RELOAD_INTERVAL = 5.0
+
+    # Recent scans kept for repeated texts (system prompts, chat history); longer texts aren't kept
+    SCAN_CACHE_SIZE = 512
+    SCAN_CACHE_MAX_TEXT = 16384
+
+    def __init__(self, lazy_spacy=None):
+        # analyzer is the full pipeline, spaCy NER included - used for responses and masking.
+        # With lazy_spacy, requests are scanned by fast_analyzer (pattern recognizers only)
+        # and spaCy NER (PERSON etc.) is deferred to responses, so names are no longer blocked.
+        # Off unless enabled in pii.yaml; the plugin loader passes no arguments
+        if lazy_spacy is None:
+            lazy_spacy = _lazy_spacy_from_config()
+        self.analyzer, self.fast_analyzer, self.anonymizer = _get_engines(lazy_spacy)
+        self.lazy_spacy = self.fast_analyzer is not self.analyzer
 
         # Print loaded recognizers for debugging
         # print("[DEBUG] Recognizers loaded:", [r.name for r in self.analyzer.get_recognizers(language="en")])
@@ -50,6 +256,10 @@ class WagTailPIIGuard(PluginBase):
             "BANK_ACCOUNT", "US_SSN", "NRIC", "NRIC_NUMBER", "IBAN_CODE", "PERSON", "IP_ADDRESS"
         ]
         self.confidence_threshold = get_confidence_threshold()
+        self._last_config_reload = time.monotonic()
+        self._entity_filters = {}
+        # (text, language, full analyzer?) -> (results, findings) as tuples; cleared on config changes
+        self._scan_cache = OrderedDict()
 
         # DEBUG: Print recognizer list at startup
         # try:
@@ -58,8 +268,37 @@ class WagTailPIIGuard(PluginBase):
         # except Exception as e:
         #     print("[DEBUG] Could not get Presidio recognizers:", e)
 
-    def reload_config(self):
-        """Reload configuration from YAML file for live updates"""
+    def _analyze(self, analyzer, text, language, entity_types):
+        """Presidio results for `entity_types` at or above confidence_threshold
+
+        Only entity types `analyzer` has a recognizer for are requested (Presidio warns about
+        the others on every call), narrowed to those a Hyperscan pass says can occur.
+        """
+        key = (id(analyzer), language)
+        entity_filter = self._entity_filters.get(key)
+        if entity_filter is None:
+            entity_filter = self._entity_filters[key] = _EntityFilter(analyzer, language)
+        entities = [t for t in entity_types if t in entity_filter.supported]
+        if entities:
+            possible = entity_filter.possible_entities(text)
+            if possible is not None:
+                entities = [t for t in entities if t in possible]
+        if not entities:
+            return []
+        return analyzer.analyze(
+            text=text,
+            language=language,
+            entities=entities,
+            score_threshold=self.confidence_threshold,
+        )
+
+    def reload_config(self, force=False):
+        """Reload configuration from YAML file for live updates, at most once per CONFIG_RELOAD_INTERVAL"""
+        now = time.monotonic()
+        if not force and now - self._last_config_reload < self.CONFIG_RELOAD_INTERVAL:
+            return
+        self._last_config_reload = now
+
         try:
             # Reload allowed PII types
             new_allowed_types = get_allowed_pii_types()
@@ -68,6 +307,7 @@ class WagTailPIIGuard(PluginBase):
                     "EMAIL_ADDRESS", "PHONE_NUMBER", "CREDIT_CARD", "HK_ID", "US_PASSPORT",
                     "BANK_ACCOUNT", "US_SSN", "NRIC", "NRIC_NUMBER", "IBAN_CODE", "PERSON", "IP_ADDRESS"
                 ]
+                self._scan_cache.clear()
                 logger.info(f"[WagTailPIIGuard] Updated allowed PII types: {self.allowed_pii_types}")
             
             # Reload confidence threshold
@@ -75,17 +315,40 @@ class WagTailPIIGuard(PluginBase):
             if new_threshold != self.confidence_threshold:
                 old_threshold = self.confidence_threshold
                 self.confidence_threshold = new_threshold
+                self._scan_cache.clear()
                 logger.info(f"[WagTailPIIGuard] Updated confidence threshold: {old_threshold} -> {new_threshold}")
         except Exception as e:
             # If reload fails, keep existing configuration
             logger.warning(f"[WagTailPIIGuard] Failed to reload config: {e}")
 
-    def scan_for_pii(self, text, language='en'):
+    def scan_for_pii(self, text, language='en', deep=True):
+        """Allowed PII entities in `text`; deep=False uses fast_analyzer (no spaCy NER with lazy_spacy)"""
+        return self._scan(text, language, deep)[1]
+
+    def _scan(self, text, language='en', deep=True):
+        """(raw analyzer results, allowed findings) for `text`, so callers can reuse the analysis"""
         # Handle null/empty input
         if text is None:
             raise TypeError("Cannot scan None text for PII")
-        if not text or not text.strip():
-            return []
+        if not text or text.isspace():
+            return [], []
+
+        analyzer = self.analyzer if deep else self.fast_analyzer
+        entity_types = self.allowed_pii_types
+        if analyzer is not self.analyzer:
+            entity_types = [t for t in entity_types if t not in _SPACY_ONLY_ENTITY_TYPES]
+
+        # Skip Presidio when no enabled entity type can occur in the text
+        prefilter = _pii_prefilter(tuple(entity_types))
+        if prefilter is not None and not prefilter.search(text):
+            return [], []
+
+        key = (text, language, analyzer is self.analyzer)
+        cached = self._scan_cache.get(key)
+        if cached is not None:
+            self._scan_cache.move_to_end(key)
+            # Fresh lists, so callers can't change what later hits see
+            return list(cached[0]), list(cached[1])
         
         # DEBUG: Show recognizers every call (for troubleshooting)
         # try:
@@ -94,7 +357,7 @@ class WagTailPIIGuard(PluginBase):
         # except Exception as e:
         #     print("[DEBUG] Could not get recognizers:", e)
 
-        results = self.analyzer.analyze(text=text, language=language)
+        results = self._analyze(analyzer, text, language, entity_types)
         # print("[DEBUG] Presidio raw results:", results)
         findings = [
             {
@@ -105,7 +368,6 @@ class WagTailPIIGuard(PluginBase):
                 "text": text[r.start:r.end]
             }
             for r in results
-            if r.entity_type in self.allowed_pii_types and r.score >= self.confidence_threshold
         ]
         logger.debug(
             f"[WagTailPIIGuard] scan_for_pii: Found {len(findings)} entities "
@@ -114,41 +376,68 @@ class WagTailPIIGuard(PluginBase):
         if findings:
             logger.info(f"[WagTailPIIGuard] Detected PII: {[f['entity_type'] for f in findings]}")
         # print("PII findings:", findings)
-        return findings
+        self._remember_scan(key, results, findings)
+        return results, findings
 
-    def mask_pii(self, text, language='en', mask_char='*'):
-        from presidio_anonymizer.entities import OperatorConfig
-        
+    def _remember_scan(self, key, results, findings):
+        if len(key[0]) > self.SCAN_CACHE_MAX_TEXT:
+            return
+        cache = self._scan_cache
+        cache[key] = (tuple(results), tuple(findings))
+        cache.move_to_end(key)
+        while len(cache) > self.SCAN_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    def mask_pii(self, text, language='en', mask_char='*', results=None, use_presidio_anonymizer=False):
+        """Mask every allowed PII entity in `text`; pass `results` to reuse an earlier analysis of `text`
+
+        Each entity is replaced in place by `mask_char` repeated to its length (overlapping
+        entities are masked as one span). use_presidio_anonymizer=True routes through
+        AnonymizerEngine instead.
+        """
         # Handle null/empty input
         if text is None:
             raise TypeError("Cannot mask PII in None text")
-        if not text or not text.strip():
+        if not text or text.isspace():
             return text
         
-        results = self.analyzer.analyze(text=text, language=language)
+        if results is None:
+            results = self._analyze(self.analyzer, text, language, self.allowed_pii_types)
         if not results:
             logger.debug("[WagTailPIIGuard] mask_pii: No PII found.")
             return text
         logger.info(f"[WagTailPIIGuard] mask_pii: Masking {len(results)} PII entities in text.")
-        
-        # Create operators dict with OperatorConfig objects
-        operators = {}
-        for r in results:
-            operators[r.entity_type] = OperatorConfig(
-                "replace", 
-                {"new_value": mask_char * (r.end - r.start)}
-            )
-        
-        anonymized_result = self.anonymizer.anonymize(
-            text=text,
-            analyzer_results=results,
-            operators=operators
-        )
-        logger.debug(f"[WagTailPIIGuard] mask_pii: Masked text: '{anonymized_result.text[:40]}...'")
-        return anonymized_result.text
+
+        if use_presidio_anonymizer:
+            # One config for every entity: Presidio's mask operator masks each span to its own length
+            operators = {"DEFAULT": OperatorConfig("mask", {
+                "masking_char": mask_char,
+                "chars_to_mask": max(r.end - r.start for r in results),
+                "from_end": False,
+            })}
+            
+            masked = self.anonymizer.anonymize(
+                text=text,
+                analyzer_results=results,
+                operators=operators
+            ).text
+        else:
+            parts = []
+            pos = 0
+            for r in sorted(results, key=lambda r: r.start):
+                start = max(r.start, pos)
+                if r.end <= start:
+                    continue
+                parts.append(text[pos:start])
+                parts.append(mask_char * (r.end - start))
+                pos = r.end
+            parts.append(text[pos:])
+            masked = "".join(parts)
+        logger.debug(f"[WagTailPIIGuard] mask_pii: Masked text: '{masked[:40]}...'")
+        return masked
 
     def on_request(self, request, context):
-        # Reload configuration on each request for live updates
+        # Pick up config edits (throttled to CONFIG_RELOAD_INTERVAL)
         self.reload_config()
         
         # Handle null context
@@ -158,25 +447,11 @@ class WagTailPIIGuard(PluginBase):
         # Check for messages in context (modern format)
         messages = context.get("messages", [])
         if messages:
-            for msg in messages:
-                content = msg.get("content", "")
-                if content:
-                    findings = self.scan_for_pii(content)
-                    if findings:
-                        # Create detailed block reason with recognizer info
-                        pii_types = [f["entity_type"] for f in findings]
-                        pii_types_str = ", ".join(pii_types)
-                        block_reason = f"PII detected ({pii_types_str})"
-                        
-                        logger.warning(f"[WagTailPIIGuard] Blocking message with PII: {pii_types}")
-                        return {
-                            "response": {"prompt": ""},
-                            "flag": "blocked",
-                            "reason": block_reason,
-                            "classified_type": "pii",
-                            "pii_entities": pii_types,
-                            "pii_examples": [f["text"] for f in findings]
-                        }
+            contents = [c for c in (msg.get("content") for msg in messages) if c and not c.isspace()]
+            if contents:
+                findings = self._scan_messages(contents)
+                if findings:
+                    return self._block_response(findings, "message")
             context["pii_detected"] = False
             return None
             
@@ -184,35 +459,77 @@ class WagTailPIIGuard(PluginBase):
         prompt = context.get("prompt")
         if not prompt:
             return None
-        findings = self.scan_for_pii(prompt)
+        findings = self.scan_for_pii(prompt, deep=False)
         if findings:
-            logger.warning(f"[WagTailPIIGuard] Blocking prompt with PII: {findings}")
-            # Create detailed block reason with recognizer info
-            pii_types = [f["entity_type"] for f in findings]
-            pii_types_str = ", ".join(pii_types)
-            block_reason = f"PII detected ({pii_types_str})"
-            
-            return {
-                "response": {"prompt": ""},
-                "flag": "blocked",
-                "reason": block_reason,
-                "classified_type": "pii",
-                "pii_entities": pii_types,
-                "pii_examples": [f["text"] for f in findings]
-            }
+            return self._block_response(findings, "prompt")
         return None  # Allow prompt through if no PII detected
+
+    def _scan_messages(self, contents):
+        """Findings of the first message with PII, as scanning each message on its own reports them
+
+        Messages the scan cache knows to be PII-free are skipped and the rest are analysed
+        in one Presidio call. If that finds nothing, each is cached on its own for later
+        requests; otherwise see _first_message_findings.
+        """
+        full = self.fast_analyzer is self.analyzer
+        pending = []
+        for content in contents:
+            cached = self._scan_cache.get((content, "en", full))
+            if cached is None or cached[1]:
+                pending.append(content)
+        if not pending:
+            return []
+        if len(pending) == 1:
+            return self.scan_for_pii(pending[0], deep=False)
+
+        findings = self.scan_for_pii(_MESSAGE_SEPARATOR.join(pending), deep=False)
+        if not findings:
+            for content in pending:
+                self._remember_scan((content, "en", full), [], [])
+            return []
+        return self._first_message_findings(pending, findings)
+
+    def _first_message_findings(self, contents, joined_findings):
+        """Findings of the first of `contents` with PII of its own, given the findings for them joined
+
+        A hit in the joined text can straddle two messages (hiding a shorter hit inside one
+        of them) or draw context words from the message before, so every message a hit
+        overlaps is scanned again alone, in order. Only requests with a hit pay for this.
+        """
+        start = 0
+        for content in contents:
+            end = start + len(content)
+            if any(f["start"] < end and f["end"] > start for f in joined_findings):
+                findings = self.scan_for_pii(content, deep=False)
+                if findings:
+                    return findings
+            start = end + len(_MESSAGE_SEPARATOR)
+        return []
+
+    def _block_response(self, findings, source):
+        """Build the block result for a PII hit, joining the entity types only once"""
+        pii_types = [f["entity_type"] for f in findings]
+        pii_types_str = ", ".join(pii_types)
+        logger.warning("[WagTailPIIGuard] Blocking %s with PII: %s", source, pii_types_str)
+        return {
+            "response": {"prompt": ""},
+            "flag": "blocked",
+            "reason": f"PII detected ({pii_types_str})",
+            "classified_type": "pii",
+            "pii_entities": pii_types,
+            "pii_examples": [f["text"] for f in findings]
+        }
     
     def on_response(self, request, context, response):
         # Handle response masking - note: added 'request' parameter to match expected signature
         if response and hasattr(response, 'content'):
             try:
-                findings = self.scan_for_pii(response.content)
+                results, findings = self._scan(response.content)
                 if findings:
                     logger.info(f"[WagTailPIIGuard] Found PII in response, masking...")
-                    masked_content = self.mask_pii(response.content)
-                    # Create new response object with masked content
-                    from copy import deepcopy
-                    masked_response = deepcopy(response)
+                    masked_content = self.mask_pii(response.content, results=results)
+                    # Shallow copy: only .content changes, so nested data can be shared
+                    masked_response = copy.copy(response)
                     masked_response.content = masked_content
                     return masked_response
             except Exception as e:
@@ -4,22 +4,53 @@ Simple test script for Wag-Tail AI Gateway OSS Edition
 Tests basic functionality: health, plugins, and chat endpoints
 """
 
-import requests
-import json
+import argparse
+import threading
 import time
 import sys
 
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+
 # Configuration
 API_URL = "http://localhost:8000"
 API_KEY = "demo-key-for-testing"  # Use the demo key from README
 
+# requests.Session isn't documented as thread-safe, so each worker thread gets its own
+_LOCAL = threading.local()
+_SESSIONS = []
+_SESSIONS_LOCK = threading.Lock()
+
+def session():
+    """Keep-alive session for the calling thread's requests to the gateway
+
+    requests is imported on first use so collecting this module stays cheap.
+    """
+    current = getattr(_LOCAL, "session", None)
+    if current is None:
+        import requests
+        current = requests.Session()
+        # Every body we send is JSON, so set the header once rather than per request
+        current.headers["Content-Type"] = "application/json"
+        _LOCAL.session = current
+        with _SESSIONS_LOCK:
+            _SESSIONS.append(current)
+    return current
+
+def close_sessions():
+    """Close every session opened by session()"""
+    with _SESSIONS_LOCK:
+        for opened in _SESSIONS:
+            opened.close()
+        _SESSIONS.clear()
+
 def test_health():
     """Test health endpoint"""
     print("\n1. Testing Health Endpoint...")
     try:
-        response = requests.get(f"{API_URL}/health")
+        response = session().get(f"{API_URL}/health")
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"   ✅ Health check passed: {data['status']}")
             print(f"   Edition: {data.get('edition', 'unknown')}")
             return True
@@ -34,9 +65,9 @@ def test_plugins():
     """Test plugins endpoint"""
     print("\n2. Testing Plugins Endpoint...")
     try:
-        response = requests.get(f"{API_URL}/plugins")
+        response = session().get(f"{API_URL}/plugins")
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"   ✅ Plugins loaded: {data['total_plugins']}")
             print(f"   Edition: {data['edition']}")
             for plugin in data.get('plugins', []):
@@ -49,23 +80,41 @@ def test_plugins():
         print(f"   ❌ Plugins check error: {e}")
         return False
 
+def post_chat(prompt, api_key=API_KEY, timeout=10, **fields):
+    """POST a prompt to /chat through the shared session"""
+    headers = {"X-API-Key": api_key}
+    body = orjson.dumps({"prompt": prompt, "model": "mistral", **fields})
+    return session().post(f"{API_URL}/chat", headers=headers, data=body, timeout=timeout)
+
+def expect_blocked(prompt, detected, hint, label):
+    """Shared check for prompts a guard plugin must block"""
+    try:
+        response = post_chat(prompt)
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            if result.get('flag') == 'blocked':
+                print(f"   ✅ {detected} detected and blocked")
+                print(f"   Reason: {result.get('reason', 'unknown')}")
+                return True
+            else:
+                print(f"   ⚠️  {detected} not detected - check {hint}")
+                return False
+        else:
+            print(f"   ❌ Request failed: HTTP {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"   ❌ {label} test error: {e}")
+        return False
+
 def test_chat_safe():
     """Test chat with safe prompt"""
+    import requests
     print("\n3. Testing Safe Prompt...")
-    headers = {
-        "X-API-Key": API_KEY,
-        "Content-Type": "application/json"
-    }
-    data = {
-        "prompt": "What is 2 plus 2?",
-        "model": "mistral",
-        "temperature": 0.7
-    }
     
     try:
-        response = requests.post(f"{API_URL}/chat", headers=headers, json=data, timeout=30)
+        response = post_chat("What is 2 plus 2?", timeout=30, temperature=0.7)
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             if result.get('flag') == 'safe':
                 print(f"   ✅ Safe prompt processed successfully")
                 print(f"   Provider: {result.get('provider', 'unknown')}")
@@ -92,77 +141,21 @@ def test_chat_safe():
 def test_chat_pii():
     """Test chat with PII detection"""
     print("\n4. Testing PII Detection...")
-    headers = {
-        "X-API-Key": API_KEY,
-        "Content-Type": "application/json"
-    }
-    data = {
-        "prompt": "My email is john@example.com and my phone is 555-1234",
-        "model": "mistral"
-    }
-    
-    try:
-        response = requests.post(f"{API_URL}/chat", headers=headers, json=data, timeout=10)
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('flag') == 'blocked':
-                print(f"   ✅ PII detected and blocked")
-                print(f"   Reason: {result.get('reason', 'unknown')}")
-                return True
-            else:
-                print(f"   ⚠️  PII not detected - check PII guard plugin")
-                return False
-        else:
-            print(f"   ❌ Request failed: HTTP {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"   ❌ PII test error: {e}")
-        return False
+    return expect_blocked("My email is john@example.com and my phone is 555-1234",
+                          "PII", "PII guard plugin", "PII")
 
 def test_chat_injection():
     """Test SQL injection detection"""
     print("\n5. Testing SQL Injection Detection...")
-    headers = {
-        "X-API-Key": API_KEY,
-        "Content-Type": "application/json"
-    }
-    data = {
-        "prompt": "SELECT * FROM users WHERE 1=1; DROP TABLE users;",
-        "model": "mistral"
-    }
-    
-    try:
-        response = requests.post(f"{API_URL}/chat", headers=headers, json=data, timeout=10)
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('flag') == 'blocked':
-                print(f"   ✅ SQL injection detected and blocked")
-                print(f"   Reason: {result.get('reason', 'unknown')}")
-                return True
-            else:
-                print(f"   ⚠️  SQL injection not detected - check basic guard plugin")
-                return False
-        else:
-            print(f"   ❌ Request failed: HTTP {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"   ❌ Injection test error: {e}")
-        return False
+    return expect_blocked("SELECT * FROM users WHERE 1=1; DROP TABLE users;",
+                          "SQL injection", "basic guard plugin", "Injection")
 
 def test_invalid_api_key():
     """Test invalid API key rejection"""
     print("\n6. Testing Invalid API Key...")
-    headers = {
-        "X-API-Key": "invalid-key-12345",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "prompt": "Test prompt",
-        "model": "mistral"
-    }
     
     try:
-        response = requests.post(f"{API_URL}/chat", headers=headers, json=data, timeout=10)
+        response = post_chat("Test prompt", api_key="invalid-key-12345")
         if response.status_code == 401:
             print(f"   ✅ Invalid API key properly rejected")
             return True
@@ -173,8 +166,13 @@ def test_invalid_api_key():
         print(f"   ❌ API key test error: {e}")
         return False
 
-def main():
+def main(argv=None):
     """Run all tests"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skip-llm", action="store_true",
+                        help="skip the safe prompt test, which waits on a real LLM completion")
+    args = parser.parse_args(argv)
+    
     print("=" * 60)
     print("WAG-TAIL AI GATEWAY OSS EDITION - TEST SUITE")
     print("=" * 60)
@@ -184,7 +182,7 @@ def main():
     # Check if server is running
     print("\nChecking if server is running...")
     try:
-        response = requests.get(f"{API_URL}/", timeout=5)
+        response = session().get(f"{API_URL}/", timeout=5)
         if response.status_code == 200:
             print("✅ Server is running")
         else:
@@ -194,14 +192,24 @@ def main():
         print("   uvicorn main:app --reload")
         sys.exit(1)
     
-    # Run tests
-    results = []
-    results.append(("Health Check", test_health()))
-    results.append(("Plugins", test_plugins()))
-    results.append(("Safe Prompt", test_chat_safe()))
-    results.append(("PII Detection", test_chat_pii()))
-    results.append(("SQL Injection", test_chat_injection()))
-    results.append(("Invalid API Key", test_invalid_api_key()))
+    # Run tests - they are independent round-trips, so overlap their network waits
+    # (progress lines may interleave; the summary below keeps this order)
+    tests = [
+        ("Health Check", test_health),
+        ("Plugins", test_plugins),
+        ("Safe Prompt", test_chat_safe),
+        ("PII Detection", test_chat_pii),
+        ("SQL Injection", test_chat_injection),
+        ("Invalid API Key", test_invalid_api_key),
+    ]
+    if args.skip_llm:
+        tests = [test for test in tests if test[1] is not test_chat_safe]
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            outcomes = list(executor.map(lambda test: test[1](), tests))
+    finally:
+        close_sessions()
+    results = [(name, outcome) for (name, _), outcome in zip(tests, outcomes)]
     
     # Summary
     print("\n" + "=" * 60)
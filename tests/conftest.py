@@ -0,0 +1,37 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Shared pytest setup for the Wag-Tail AI Gateway test suite
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Gateway modules and plugin packages, wherever pytest runs from. startoken-plugins
+# itself goes last (plugin_loader adds it only when missing): there the PII guard
+# resolves to its distribution directory rather than the package
+sys.path[:0] = [
+    str(path) for path in (
+        ROOT,
+        ROOT / "startoken-plugins" / "wag_tail_basic_guard",
+        ROOT / "startoken-plugins" / "wag_tail_pii_guard",
+        ROOT / "startoken-plugins",
+    )
+    if str(path) not in sys.path
+]
+
+# Stand-ins for gateway modules that are not part of this tree (pii_config_loader,
+# plugins.base); appended so an installed gateway's own modules take precedence
+sys.path.append(str(Path(__file__).resolve().parent / "stubs"))
+
+
+@pytest.fixture(autouse=True)
+def _unittest_monkeypatch(request, monkeypatch):
+    """Expose pytest's monkeypatch to unittest.TestCase tests as self.monkeypatch"""
+    if request.instance is not None:
+        request.instance.monkeypatch = monkeypatch
@@ -0,0 +1,29 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Test stand-in for the gateway's pii_config_loader
+Reads the PII guard settings from the repository's config/pii.yaml
+"""
+
+from pathlib import Path
+
+import yaml
+
+PII_CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "pii.yaml"
+
+
+def _load_pii_config():
+    try:
+        with open(PII_CONFIG_PATH, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    except OSError:
+        return {}
+
+
+def get_allowed_pii_types():
+    return _load_pii_config().get("allowed_pii_types")
+
+
+def get_confidence_threshold():
+    return _load_pii_config().get("confidence_threshold", 0.5)
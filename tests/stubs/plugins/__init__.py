@@ -0,0 +1,2 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
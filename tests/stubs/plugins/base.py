@@ -0,0 +1,18 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Test stand-in for the gateway's plugin base class
+"""
+
+
+class PluginBase:
+    """Hooks every gateway plugin provides; each returns None to let the request through"""
+
+    name = "plugin_base"
+
+    def on_request(self, request, context):
+        return None
+
+    def on_response(self, request, context, response):
+        return None
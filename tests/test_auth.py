@@ -0,0 +1,201 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+API Key Validation Test Suite for Wag-Tail AI Gateway
+Tests the per-key verdict cache in front of the database, its invalidation, and the
+batched last_used_at writes
+"""
+
+import sqlite3
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+
+from utils import auth
+
+
+def _key_database(api_key, org_id="org1", user_id="user1"):
+    """In-memory api_keys table holding one active key"""
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False, "detect_types": sqlite3.PARSE_DECLTYPES},
+    )
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE api_keys (
+                api_key TEXT PRIMARY KEY, org_id TEXT, user_id TEXT,
+                status TEXT, expires_at TIMESTAMP, last_used_at TIMESTAMP
+            )
+        """))
+        conn.execute(text(
+            "INSERT INTO api_keys (api_key, org_id, user_id, status) "
+            "VALUES (:api_key, :org_id, :user_id, 'active')"
+        ), {"api_key": api_key, "org_id": org_id, "user_id": user_id})
+        conn.commit()
+    return engine
+
+
+class TestAPIKeyVerdictCache(unittest.TestCase):
+    """Test suite for validate_api_key's recent-verdict tier"""
+
+    def setUp(self):
+        """Set up an in-memory database with one active key and empty key caches"""
+        self.monkeypatch.setattr(auth, "_recent_validations", {})
+        self.monkeypatch.setattr(auth, "_api_key_cache", {})
+        self.monkeypatch.setattr(auth, "_cache_updated_at", None)
+        self.monkeypatch.setattr(auth, "load_fallback_api_keys", lambda: {})
+        # Keep the batched last_used_at writer thread out of the tests
+        self.marked = []
+        self.monkeypatch.setattr(auth, "_mark_key_used",
+                                 lambda api_key, db_engine: self.marked.append(api_key))
+        self.engine = _key_database("key-active-123456")
+        self.queries = 0
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def _count_key_lookups(self):
+        """Count the single-key SELECTs validate_api_key sends to the database"""
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if "WHERE api_key = " in statement and statement.lstrip().startswith("SELECT"):
+                self.queries += 1
+
+        event.listen(self.engine, "before_cursor_execute", before_execute)
+
+    def _set_status(self, status):
+        with self.engine.connect() as conn:
+            conn.execute(text("UPDATE api_keys SET status = :status"), {"status": status})
+            conn.commit()
+
+    def test_valid_verdict_reused(self):
+        """Test that a valid key is answered from the verdict cache within its TTL"""
+        self._count_key_lookups()
+
+        self.assertEqual(auth.validate_api_key("key-active-123456", self.engine), (True, "org1", "user1"))
+        self.assertEqual(auth.validate_api_key("key-active-123456", self.engine), (True, "org1", "user1"))
+        self.assertEqual(self.queries, 1)
+        # Only the database check queues a last_used_at write
+        self.assertEqual(self.marked, ["key-active-123456"])
+
+    def test_negative_verdict_expires_after_ttl(self):
+        """Test that an invalid verdict is only trusted for the negative TTL"""
+        self._set_status("inactive")
+        self._count_key_lookups()
+        now = [1000.0]
+        self.monkeypatch.setattr(auth.time, "time", lambda: now[0])
+
+        self.assertEqual(auth.validate_api_key("key-active-123456", self.engine), (False, None, None))
+        self._set_status("active")
+        now[0] += auth._NEGATIVE_VERDICT_TTL - 1
+        self.assertEqual(auth.validate_api_key("key-active-123456", self.engine), (False, None, None))
+        self.assertEqual(self.queries, 1)
+
+        now[0] += 2
+        self.assertEqual(auth.validate_api_key("key-active-123456", self.engine), (True, "org1", "user1"))
+        self.assertEqual(self.queries, 2)
+
+    def test_cached_valid_key_rechecked_after_expiry(self):
+        """Test that a key expiring inside the valid TTL goes back to the database"""
+        expires_at = datetime.now() + timedelta(hours=1)
+        with self.engine.connect() as conn:
+            conn.execute(text("UPDATE api_keys SET expires_at = :expires_at"), {"expires_at": expires_at})
+            conn.commit()
+        self._count_key_lookups()
+
+        self.assertTrue(auth.validate_api_key("key-active-123456", self.engine)[0])
+        with self.engine.connect() as conn:
+            conn.execute(text("UPDATE api_keys SET expires_at = :expires_at"),
+                         {"expires_at": datetime.now() - timedelta(seconds=1)})
+            conn.commit()
+        # Backdate the cached expiry: the verdict is still fresh, the key is not
+        checked_at, verdict, org_id, user_id, _ = auth._recent_validations["key-active-123456"]
+        auth._recent_validations["key-active-123456"] = (
+            checked_at, verdict, org_id, user_id, datetime.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(auth.validate_api_key("key-active-123456", self.engine), (False, None, None))
+        self.assertEqual(self.queries, 2)
+
+    def test_invalidate_api_key(self):
+        """Test that invalidate_api_key forces the next validation to the database"""
+        self._count_key_lookups()
+        auth.validate_api_key("key-active-123456", self.engine)
+
+        auth.invalidate_api_key("key-active-123456")
+        auth.invalidate_api_key("key-never-seen")
+
+        auth.validate_api_key("key-active-123456", self.engine)
+        self.assertEqual(self.queries, 2)
+
+    def test_full_cache_evicts_stale_verdicts_first(self):
+        """Test that a full verdict cache drops expired entries before fresh ones"""
+        self.monkeypatch.setattr(auth, "_RECENT_VALIDATIONS_MAX", 3)
+        now = [1000.0]
+        self.monkeypatch.setattr(auth.time, "time", lambda: now[0])
+
+        auth._remember_verdict("fresh-valid", "valid", "org1", "user1")
+        auth._remember_verdict("stale-missing", "missing")
+        now[0] += auth._NEGATIVE_VERDICT_TTL + 1
+        auth._remember_verdict("fresh-invalid", "invalid")
+        auth._remember_verdict("newest", "missing")
+
+        self.assertEqual(set(auth._recent_validations), {"fresh-valid", "fresh-invalid", "newest"})
+
+    def test_full_cache_of_fresh_verdicts_is_cleared(self):
+        """Test that the verdict cache stays bounded when nothing in it is stale"""
+        self.monkeypatch.setattr(auth, "_RECENT_VALIDATIONS_MAX", 2)
+
+        auth._remember_verdict("a", "valid")
+        auth._remember_verdict("b", "valid")
+        auth._remember_verdict("c", "valid")
+
+        self.assertEqual(set(auth._recent_validations), {"c"})
+
+
+class TestLastUsedFlush(unittest.TestCase):
+    """Test suite for the batched last_used_at writes"""
+
+    def setUp(self):
+        self.monkeypatch.setattr(auth, "_last_used_pending", {})
+        # Pretend the writer thread runs so the test flushes by hand
+        self.monkeypatch.setattr(auth, "_last_used_thread", object())
+        self.engines = [_key_database("key-first-111111"), _key_database("key-second-222222")]
+        for engine in self.engines:
+            self.addCleanup(engine.dispose)
+
+    def _last_used(self, engine):
+        with engine.connect() as conn:
+            return dict(conn.execute(text("SELECT api_key, last_used_at FROM api_keys")).fetchall())
+
+    def test_keys_flushed_to_their_own_engine(self):
+        """Test that keys validated against two databases are each written to their own"""
+        first, second = self.engines
+        auth._mark_key_used("key-first-111111", first)
+        auth._mark_key_used("key-second-222222", second)
+
+        auth.flush_last_used()
+
+        self.assertIsNotNone(self._last_used(first)["key-first-111111"])
+        self.assertIsNotNone(self._last_used(second)["key-second-222222"])
+        self.assertEqual(auth._last_used_pending, {})
+
+    def test_failed_engine_does_not_block_others(self):
+        """Test that a failed write to one database still flushes the other"""
+        first, second = self.engines
+        with first.connect() as conn:
+            conn.execute(text("DROP TABLE api_keys"))
+            conn.commit()
+        auth._mark_key_used("key-first-111111", first)
+        auth._mark_key_used("key-second-222222", second)
+
+        auth.flush_last_used()
+
+        self.assertIsNotNone(self._last_used(second)["key-second-222222"])
+
+
+if __name__ == '__main__':
+    unittest.main()
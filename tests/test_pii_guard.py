@@ -0,0 +1,285 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+PII Guard Test Suite for Wag-Tail AI Gateway
+Tests request blocking with and without lazy spaCy NER, the scan cache, one-call scanning of
+request messages, and the Hyperscan entity prefilter
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+import yaml
+
+spacy = pytest.importorskip("spacy")
+pytest.importorskip("presidio_analyzer")
+
+from presidio_analyzer import AnalyzerEngine, Pattern, PatternRecognizer
+from presidio_analyzer.nlp_engine import NlpEngineProvider
+from presidio_anonymizer import AnonymizerEngine
+
+from wag_tail_pii_guard import wag_tail_pii_guard as pii_module
+from wag_tail_pii_guard import WagTailPIIGuard
+
+PII_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "pii.yaml"
+
+
+def _small_engines(model_dir):
+    """Presidio engines on a blank spaCy pipeline, saved to `model_dir`, whose NER only knows one name"""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler", name="ner")
+    ruler.add_patterns([{"label": "PERSON", "pattern": "John Smith"}])
+    nlp.to_disk(model_dir)
+    nlp_engine = NlpEngineProvider(nlp_configuration={
+        "nlp_engine_name": "spacy",
+        "models": [{"lang_code": "en", "model_name": str(model_dir)}],
+    }).create_engine()
+    analyzer = AnalyzerEngine(nlp_engine=nlp_engine)
+    pii_module._register_recognizers(analyzer)
+    return {"analyzer": analyzer, "anonymizer": AnonymizerEngine()}
+
+
+class TestPIIGuardLazySpacy(unittest.TestCase):
+    """Test suite for the lazy_spacy setting"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.monkeypatch.setattr(pii_module, "_ENGINES", _small_engines(self.temp_dir / "model"))
+
+    def _write_pii_config(self, text):
+        path = self.temp_dir / "pii.yaml"
+        path.write_text(text, encoding="utf-8")
+        self.monkeypatch.setattr(pii_module, "_PII_CONFIG_PATH", str(path))
+
+    def _request(self, content):
+        return {"messages": [{"role": "user", "content": content}]}
+
+    def test_person_blocked_when_lazy_spacy_off(self):
+        """Test that spaCy NER still scans requests when lazy_spacy is off"""
+        guard = WagTailPIIGuard(lazy_spacy=False)
+        guard.allowed_pii_types = ["PERSON"]
+
+        result = guard.on_request(None, self._request("Please write to John Smith today"))
+
+        self.assertIsNotNone(result)
+        self.assertEqual(result["flag"], "blocked")
+        self.assertIn("PERSON", result["pii_entities"])
+
+    def test_lazy_spacy_defaults_off(self):
+        """Test that lazy_spacy is off when pii.yaml doesn't set it"""
+        self._write_pii_config("confidence_threshold: 0.5\n")
+        guard = WagTailPIIGuard()
+        self.assertFalse(guard.lazy_spacy)
+
+        guard.allowed_pii_types = ["PERSON"]
+        result = guard.on_request(None, self._request("Please write to John Smith today"))
+        self.assertIsNotNone(result)
+
+    def test_lazy_spacy_read_from_config(self):
+        """Test that lazy_spacy in pii.yaml moves NER off the request path"""
+        self._write_pii_config("lazy_spacy: true\n")
+        guard = WagTailPIIGuard()
+        self.assertTrue(guard.lazy_spacy)
+
+        guard.allowed_pii_types = ["PERSON", "EMAIL_ADDRESS"]
+        self.assertIsNone(guard.on_request(None, self._request("Please write to John Smith today")))
+        # Pattern-based entities are still blocked
+        result = guard.on_request(None, self._request("Mail john@example.com"))
+        self.assertEqual(result["pii_entities"], ["EMAIL_ADDRESS"])
+
+    def test_unreadable_config_keeps_lazy_spacy_off(self):
+        """Test that a missing pii.yaml leaves spaCy NER on the request path"""
+        self.monkeypatch.setattr(pii_module, "_PII_CONFIG_PATH", str(self.temp_dir / "missing.yaml"))
+        self.assertFalse(WagTailPIIGuard().lazy_spacy)
+
+    def test_recognizers_registered_once(self):
+        """Test that each analyzer holds every recognizer once, and the fast one all but SpacyRecognizer"""
+        guard = WagTailPIIGuard(lazy_spacy=True)
+        full = [r.name for r in guard.analyzer.registry.recognizers]
+        fast = [r.name for r in guard.fast_analyzer.registry.recognizers]
+
+        self.assertEqual(len(full), len(set(full)))
+        self.assertEqual(len(fast), len(set(fast)))
+        self.assertIn("HKID Recognizer", fast)
+        self.assertEqual(sorted(full), sorted(fast + ["SpacyRecognizer"]))
+
+
+class TestScanCache(unittest.TestCase):
+    """Test suite for the per-guard cache of recent scans"""
+
+    def setUp(self):
+        model_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, model_dir)
+        self.monkeypatch.setattr(pii_module, "_ENGINES", _small_engines(model_dir / "model"))
+        self.guard = WagTailPIIGuard(lazy_spacy=False)
+        self.guard.allowed_pii_types = ["EMAIL_ADDRESS"]
+
+    def test_mutating_returned_lists_keeps_cache_intact(self):
+        """Test that changing the lists a scan returns doesn't change later cache hits"""
+        text = "Mail john@example.com today"
+        results, findings = self.guard._scan(text)
+        self.assertEqual(len(findings), 1)
+        results.clear()
+        findings.append({"entity_type": "PERSON"})
+
+        results, findings = self.guard._scan(text)
+        self.assertEqual(len(results), 1)
+        self.assertEqual([f["entity_type"] for f in findings], ["EMAIL_ADDRESS"])
+        findings.clear()
+        self.assertEqual(len(self.guard.scan_for_pii(text)), 1)
+
+
+# Message lists for comparing one joined scan with scanning each message alone
+MESSAGE_LISTS = [
+    ["Hello there", "How are you today?"],
+    ["Hello there", "Mail john@example.com today"],
+    ["Card 4111 1111 1111 1111", "Mail john@example.com today"],
+    ["phone", "2125550199"],
+    ["ssn", "536-90-4399", "thanks"],
+    ["IBAN GB82 WEST 1234", "5698 7654 32"],
+    ["ref TKT-123", "456 please"],
+    ["see TKT-9", "Mail john@example.com today"],
+    ["nothing here", "TKT-77"],
+    ["ticket REF", "42 thanks"],
+]
+
+
+class TestRequestMessages(unittest.TestCase):
+    """Test suite for scanning all of a request's messages in one Presidio call"""
+
+    def setUp(self):
+        model_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, model_dir)
+        self.monkeypatch.setattr(pii_module, "_ENGINES", _small_engines(model_dir / "model"))
+        # Ticket references may run on over whitespace, so a hit can straddle two messages
+        pii_module._ENGINES["analyzer"].registry.add_recognizer(PatternRecognizer(
+            supported_entity="TICKET", patterns=[Pattern("ticket", r"TKT-\d+(\s+\d+)?|REF\s+\d+", 0.9)],
+        ))
+        self.guard = WagTailPIIGuard(lazy_spacy=False)
+        self.guard.allowed_pii_types = ["EMAIL_ADDRESS", "CREDIT_CARD", "PHONE_NUMBER", "US_SSN", "TICKET"]
+
+    def _per_message_findings(self, contents):
+        """Findings of the first message with PII, scanning each message alone"""
+        for content in contents:
+            findings = self.guard.scan_for_pii(content, deep=False)
+            if findings:
+                return findings
+        return []
+
+    def test_matches_scanning_each_message(self):
+        """Test that the joined scan reports what scanning each message alone reports"""
+        for contents in MESSAGE_LISTS:
+            expected = self._per_message_findings(contents)
+            self.guard._scan_cache.clear()
+            with self.subTest(contents=contents):
+                self.assertEqual(self.guard._scan_messages(contents), expected)
+
+    def test_straddling_hit_does_not_hide_message_hit(self):
+        """Test that a hit across the separator doesn't hide the hit inside one message"""
+        contents = ["ref TKT-123", "456 please"]
+        joined = self.guard.scan_for_pii(pii_module._MESSAGE_SEPARATOR.join(contents), deep=False)
+        self.assertEqual([(f["entity_type"], f["text"]) for f in joined], [("TICKET", "TKT-123\n\n456")])
+
+        result = self.guard.on_request(None, {"messages": [{"role": "user", "content": c} for c in contents]})
+
+        self.assertIsNotNone(result)
+        self.assertEqual(result["pii_entities"], ["TICKET"])
+        self.assertEqual(result["pii_examples"], ["TKT-123"])
+
+    def test_hit_only_across_messages_is_allowed(self):
+        """Test that a hit made only by joining two messages doesn't block the request"""
+        contents = ["ticket REF", "42 thanks"]
+        self.assertEqual(len(self.guard.scan_for_pii(pii_module._MESSAGE_SEPARATOR.join(contents), deep=False)), 1)
+
+        context = {"messages": [{"role": "user", "content": c} for c in contents]}
+        self.assertIsNone(self.guard.on_request(None, context))
+        self.assertFalse(context["pii_detected"])
+
+
+# One text per pattern-based entity in config/pii.yaml that the entity filter can rule out
+ENTITY_SAMPLES = {
+    "EMAIL_ADDRESS": "Mail john@example.com today",
+    "CREDIT_CARD": "Card 4111 1111 1111 1111",
+    "HK_ID": "HKID A123456(7)",
+    "US_PASSPORT": "My passport number is 912803456",
+    "US_SSN": "My social security number is 536-90-4399",
+    "IBAN_CODE": "IBAN GB82 WEST 1234 5698 7654 32",
+    "IP_ADDRESS": "Host 192.168.0.1",
+}
+
+
+@pytest.mark.skipif(pii_module.hyperscan is None, reason="hyperscan not installed")
+class TestEntityFilter(unittest.TestCase):
+    """Test suite for the Hyperscan prefilter in front of Presidio"""
+
+    def setUp(self):
+        model_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, model_dir)
+        self.monkeypatch.setattr(pii_module, "_ENGINES", _small_engines(model_dir / "model"))
+        with open(PII_CONFIG_PATH, "r", encoding="utf-8") as f:
+            self.enabled = yaml.safe_load(f)["allowed_pii_types"]
+        self.analyzer = pii_module._ENGINES["analyzer"]
+        self.entity_filter = pii_module._EntityFilter(self.analyzer, "en")
+
+    def _filtered_entities(self):
+        """Enabled entity types the filter can leave out of a Presidio call"""
+        return [
+            t for t in self.enabled
+            if t in self.entity_filter.supported and t not in self.entity_filter.always
+        ]
+
+    def test_enabled_entity_samples_pass_filter(self):
+        """Test that the filter keeps every enabled entity type its sample text contains"""
+        self.assertIsNotNone(self.entity_filter.db)
+        for entity in self._filtered_entities():
+            with self.subTest(entity=entity):
+                self.assertIn(entity, ENTITY_SAMPLES, "add a sample text for this entity type")
+                sample = ENTITY_SAMPLES[entity]
+                possible = self.entity_filter.possible_entities(sample)
+                self.assertIsNotNone(possible)
+                self.assertIn(entity, possible)
+
+    def test_filter_does_not_change_findings(self):
+        """Test that analysing only the possible entities finds the same PII"""
+        entities = [t for t in self.enabled if t in self.entity_filter.supported]
+        for entity, sample in ENTITY_SAMPLES.items():
+            with self.subTest(entity=entity):
+                possible = self.entity_filter.possible_entities(sample)
+                narrowed = [t for t in entities if t in possible]
+                expected = self.analyzer.analyze(text=sample, language="en", entities=entities,
+                                                 score_threshold=0.32)
+                actual = self.analyzer.analyze(text=sample, language="en", entities=narrowed,
+                                               score_threshold=0.32)
+                self.assertEqual(
+                    sorted((r.entity_type, r.start, r.end) for r in actual),
+                    sorted((r.entity_type, r.start, r.end) for r in expected),
+                )
+
+    def test_text_without_candidates_skips_analyzer(self):
+        """Test that text no enabled pattern can match never reaches Presidio"""
+        guard = WagTailPIIGuard(lazy_spacy=False)
+        guard.allowed_pii_types = self._filtered_entities()
+        calls = []
+        analyze = self.analyzer.analyze
+        self.monkeypatch.setattr(self.analyzer, "analyze",
+                                 lambda **kwargs: calls.append(kwargs["entities"]) or analyze(**kwargs))
+
+        self.assertEqual(guard.scan_for_pii("Hello there, how are you today?"), [])
+        self.assertEqual(calls, [])
+
+        findings = guard.scan_for_pii("Mail john@example.com today")
+        self.assertEqual([f["entity_type"] for f in findings], ["EMAIL_ADDRESS"])
+        self.assertEqual(calls, [["EMAIL_ADDRESS"]])
+
+    def test_non_ascii_text_is_not_filtered(self):
+        """Test that text outside the alphabet Hyperscan agrees on keeps every entity type"""
+        self.assertIsNone(self.entity_filter.possible_entities("Grüße an john@example.com"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Response Loader Test Suite for Wag-Tail AI Gateway
+Tests the in-memory cache of the parsed responses YAML
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+
+import response_loader
+
+
+class TestResponsesCache(unittest.TestCase):
+    """Test suite for load_responses"""
+
+    def setUp(self):
+        self.monkeypatch.setattr(response_loader, "_responses_cache", {})
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = self.temp_dir / "responses.yaml"
+        self.path.write_text("errors:\n  rate_limited:\n    status_code: 429\n")
+        self.parses = 0
+        load = response_loader.yaml.load
+
+        def counting_load(*args, **kwargs):
+            self.parses += 1
+            return load(*args, **kwargs)
+
+        self.monkeypatch.setattr(response_loader.yaml, "load", counting_load)
+
+    def test_parse_reused_until_file_changes(self):
+        """Test that the YAML is parsed again only after it changes"""
+        response_loader.load_responses(str(self.path))
+        response_loader.load_responses(str(self.path))
+        self.assertEqual(self.parses, 1)
+
+        # Same mtime, different size: still picked up
+        mtime_ns = self.path.stat().st_mtime_ns
+        self.path.write_text("errors:\n  rate_limited:\n    status_code: 503\n    message: Slow down\n")
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+        data = response_loader.load_responses(str(self.path))
+        self.assertEqual(data["errors"]["rate_limited"]["status_code"], 503)
+        self.assertEqual(self.parses, 2)
+
+    def test_read_only_config_directory(self):
+        """Test that loading writes nothing next to the YAML, so read-only mounts work"""
+        os.chmod(self.temp_dir, stat.S_IRUSR | stat.S_IXUSR)
+        self.addCleanup(os.chmod, self.temp_dir, stat.S_IRWXU)
+
+        data = response_loader.load_responses(str(self.path))
+
+        self.assertEqual(data["errors"]["rate_limited"]["status_code"], 429)
+        self.assertEqual(os.listdir(self.temp_dir), ["responses.yaml"])
+
+    def test_callers_get_their_own_copy(self):
+        """Test that changing returned data doesn't change later loads"""
+        data = response_loader.load_responses(str(self.path))
+        data["errors"]["rate_limited"]["status_code"] = 500
+
+        data = response_loader.load_responses(str(self.path))
+        self.assertEqual(data["errors"]["rate_limited"]["status_code"], 429)
+        self.assertEqual(self.parses, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,14 +4,17 @@
 """
 Authentication utilities for API key validation with fallback strategies
 """
+import atexit
 import yaml
 import os
+import threading
 import time
 from datetime import datetime
 from typing import Optional, Tuple, Dict
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlalchemy.exc import SQLAlchemyError
 from wag_tail_logger import get_logger
+from utils.yaml_loader import YAML_LOADER
 
 logger = get_logger()
 
@@ -20,16 +23,81 @@ _api_key_cache = {}
 _cache_updated_at = None
 _cache_ttl = 300  # 5 minutes
 
+# Recent per-key database verdicts, consulted before querying the database:
+# api_key -> (checked_at, verdict, org_id, user_id, expires_at), where verdict is
+# "valid", "invalid" (inactive or expired) or "missing" (not in the database)
+_recent_validations = {}
+_recent_validations_lock = threading.Lock()
+_VALID_VERDICT_TTL = 30.0
+_NEGATIVE_VERDICT_TTL = 5.0
+_RECENT_VALIDATIONS_MAX = 10000
+
+# Keys validated against each database engine since the last flush; a background
+# thread writes their last_used_at in one UPDATE per engine every few seconds
+# instead of once per request. Verdict cache hits don't queue a write, so
+# last_used_at can trail real use by up to _VALID_VERDICT_TTL.
+_last_used_pending = {}
+_last_used_thread = None
+_last_used_lock = threading.Lock()
+_LAST_USED_FLUSH_INTERVAL = 5.0
+_LAST_USED_UPDATE = text("""
+    UPDATE api_keys 
+    SET last_used_at = CURRENT_TIMESTAMP 
+    WHERE api_key IN :api_keys
+""").bindparams(bindparam("api_keys", expanding=True))
+
+# Config files the fallback keys come from
+_FALLBACK_CONFIG_PATHS = ("config/sys_config.yaml", "config/internal_config.yaml")
+
+# (config file mtimes, parsed fallback keys), reused until either file changes
+_fallback_cache = None
+_fallback_lock = threading.Lock()
+
+def _fallback_config_mtimes() -> Tuple[Optional[int], ...]:
+    """st_mtime_ns of each fallback config file, None where it is missing"""
+    mtimes = []
+    for path in _FALLBACK_CONFIG_PATHS:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
 def load_fallback_api_keys() -> Dict:
-    """Load API keys from config file as fallback"""
+    """Load API keys from config file as fallback
+    
+    The parsed keys are cached and only re-read when a config file's mtime
+    changes, so validation stays cheap while the database is down.
+    """
+    global _fallback_cache
+    
+    mtimes = _fallback_config_mtimes()
+    cached = _fallback_cache
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+    
+    with _fallback_lock:
+        # Another request may have re-read the files while we waited
+        cached = _fallback_cache
+        if cached is not None and cached[0] == mtimes:
+            return cached[1]
+        
+        fallback_keys = _read_fallback_api_keys()
+        if fallback_keys is None:
+            return {}
+        _fallback_cache = (mtimes, fallback_keys)
+        return fallback_keys
+
+def _read_fallback_api_keys() -> Optional[Dict]:
+    """Parse the fallback API keys from the config files, None on failure"""
     try:
         fallback_keys = {}
         
         # Load regular config
-        config_path = "config/sys_config.yaml"
+        config_path = _FALLBACK_CONFIG_PATHS[0]
         if os.path.exists(config_path):
             with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=YAML_LOADER)
                 
             # Add admin API key
             if 'admin' in config and 'api_key' in config['admin']:
@@ -52,10 +120,10 @@ def load_fallback_api_keys() -> Dict:
                 }
         
         # Load internal config
-        internal_config_path = "config/internal_config.yaml"
+        internal_config_path = _FALLBACK_CONFIG_PATHS[1]
         if os.path.exists(internal_config_path):
             with open(internal_config_path, 'r') as f:
-                internal_config = yaml.safe_load(f)
+                internal_config = yaml.load(f, Loader=YAML_LOADER)
                 
             # Add internal API keys
             if 'internal' in internal_config and 'api_keys' in internal_config['internal']:
@@ -75,7 +143,7 @@ def load_fallback_api_keys() -> Dict:
     except Exception as e:
         logger.warning(f"Failed to load fallback API keys from config: {e}")
         
-    return {}
+    return None
 
 def get_license_org_id() -> str:
     """Get org_id from license file as ultimate fallback"""
@@ -114,6 +182,83 @@ def validate_from_fallback_config(api_key: str) -> Tuple[bool, Optional[str], Op
         
     return False, None, None
 
+def _verdict_ttl(verdict: str) -> float:
+    return _VALID_VERDICT_TTL if verdict == "valid" else _NEGATIVE_VERDICT_TTL
+
+def _remember_verdict(api_key: str, verdict: str, org_id=None, user_id=None, expires_at=None):
+    """Record a database verdict for api_key in the short-lived per-key cache"""
+    now = time.time()
+    with _recent_validations_lock:
+        if len(_recent_validations) >= _RECENT_VALIDATIONS_MAX:
+            # Bounded so a stream of random keys can't grow it without limit:
+            # drop stale verdicts first, and everything only if that frees nothing
+            for key, entry in list(_recent_validations.items()):
+                if now - entry[0] > _verdict_ttl(entry[1]):
+                    del _recent_validations[key]
+            if len(_recent_validations) >= _RECENT_VALIDATIONS_MAX:
+                _recent_validations.clear()
+        _recent_validations[api_key] = (now, verdict, org_id, user_id, expires_at)
+
+def _recent_verdict(api_key: str):
+    """Return a still-fresh (verdict, org_id, user_id) for api_key, or None"""
+    with _recent_validations_lock:
+        entry = _recent_validations.get(api_key)
+    if entry is None:
+        return None
+    
+    checked_at, verdict, org_id, user_id, expires_at = entry
+    if time.time() - checked_at > _verdict_ttl(verdict):
+        return None
+    if verdict == "valid" and expires_at and expires_at <= datetime.now():
+        # Expired since it was cached; let the database have the final say
+        return None
+    return verdict, org_id, user_id
+
+def invalidate_api_key(api_key: str):
+    """Forget cached verdicts for api_key so the next request goes back to the database
+    
+    Call after revoking, deactivating or changing a key; otherwise a revoked key
+    keeps validating for up to _VALID_VERDICT_TTL (or the in-memory cache TTL).
+    """
+    with _recent_validations_lock:
+        _recent_validations.pop(api_key, None)
+    _api_key_cache.pop(api_key, None)
+
+def _mark_key_used(api_key: str, db_engine):
+    """Queue api_key for the next batched last_used_at update on db_engine"""
+    global _last_used_thread
+    
+    with _last_used_lock:
+        _last_used_pending.setdefault(db_engine, set()).add(api_key)
+        if _last_used_thread is None:
+            _last_used_thread = threading.Thread(
+                target=_last_used_flush_loop, name="api-key-last-used", daemon=True
+            )
+            _last_used_thread.start()
+            atexit.register(flush_last_used)
+
+def _last_used_flush_loop():
+    while True:
+        time.sleep(_LAST_USED_FLUSH_INTERVAL)
+        flush_last_used()
+
+def flush_last_used():
+    """Write last_used_at for every key validated since the previous flush, per database engine"""
+    with _last_used_lock:
+        if not _last_used_pending:
+            return
+        pending = list(_last_used_pending.items())
+        _last_used_pending.clear()
+    
+    for db_engine, api_keys in pending:
+        try:
+            with db_engine.connect() as conn:
+                conn.execute(_LAST_USED_UPDATE, {"api_keys": list(api_keys)})
+                conn.commit()
+        except Exception as e:
+            # last_used_at is informational; don't let a failed write affect auth
+            logger.warning(f"Failed to update last_used_at for {len(api_keys)} API keys: {e}")
+
 def update_cache_from_database(db_engine):
     """Update in-memory cache from database when available"""
     global _api_key_cache, _cache_updated_at
@@ -145,6 +290,7 @@ def validate_api_key(api_key: str, db_engine) -> Tuple[bool, Optional[str], Opti
     Multi-tier API key validation with fallback strategies
     
     Validation Strategy:
+    0. Recent database verdict for this key (30s valid, 5s invalid/missing)
     1. Primary: Database lookup (most authoritative)
     2. Secondary: In-memory cache (recent database data)  
     3. Tertiary: Config file fallback (admin/user keys)
@@ -160,8 +306,18 @@ def validate_api_key(api_key: str, db_engine) -> Tuple[bool, Optional[str], Opti
     if not api_key:
         return False, None, None
     
+    # Tier 0: Reuse a recent database verdict instead of another round trip
+    recent = _recent_verdict(api_key) if db_engine else None
+    if recent is not None:
+        verdict, org_id, user_id = recent
+        if verdict == "valid":
+            return True, org_id, user_id
+        if verdict == "invalid":
+            return False, None, None
+        # "missing": skip the database and go straight to the fallback tiers
+    
     # Tier 1: Try database first (most authoritative)
-    if db_engine:
+    if db_engine and recent is None:
         try:
             with db_engine.connect() as conn:
                 query = text("""
@@ -183,25 +339,19 @@ def validate_api_key(api_key: str, db_engine) -> Tuple[bool, Optional[str], Opti
                         except:
                             pass  # Don't fail if cache update fails
                             
-                        # Update last_used_at
-                        try:
-                            update_query = text("""
-                                UPDATE api_keys 
-                                SET last_used_at = CURRENT_TIMESTAMP 
-                                WHERE api_key = :api_key
-                            """)
-                            conn.execute(update_query, {"api_key": api_key})
-                            conn.commit()
-                        except:
-                            pass  # Don't fail if last_used update fails
-                            
+                        # Update last_used_at (batched, off the request path)
+                        _mark_key_used(api_key, db_engine)
+                        
                         logger.debug(f"API key validated from DATABASE: {api_key[-6:]}")
+                        _remember_verdict(api_key, "valid", org_id, user_id, expires_at)
                         return True, org_id, user_id
                     else:
                         logger.warning(f"API key inactive or expired: {api_key[-6:]} status={status}")
+                        _remember_verdict(api_key, "invalid")
                         return False, None, None
                 else:
                     logger.debug(f"API key not found in database: {api_key[-6:]}")
+                    _remember_verdict(api_key, "missing")
                     
         except SQLAlchemyError as e:
             logger.warning(f"Database error, trying fallback: {e}")
@@ -3,6 +3,7 @@
 
 import hashlib
 import json
+import logging
 from utils.redis_client import r
 from wag_tail_logger import logger  # Use project logger
 
@@ -11,22 +12,33 @@ cache_available = True
 
 def get_cache_key(org_id, group_id, prompt):
     gid = group_id or ""  # Avoid literal "None" in key
-    base = f"{org_id}:{gid}:{prompt}"
-    key = "cache:" + hashlib.sha256(base.encode("utf-8")).hexdigest()
-    logger.debug(f"[CACHE] get_cache_key: base={base!r} key={key}")
+    # Same digest as hashing f"{org_id}:{gid}:{prompt}", without building that string
+    digest = hashlib.sha256(f"{org_id}:{gid}:".encode("utf-8"))
+    digest.update(prompt.encode("utf-8"))
+    key = "cache:" + digest.hexdigest()
+    if logger.isEnabledFor(logging.DEBUG):
+        base = f"{org_id}:{gid}:{prompt}"
+        logger.debug(f"[CACHE] get_cache_key: base={base!r} key={key}")
     return key
 
-def cache_get(org_id, group_id, prompt, edition="basic"):
+def cache_get(org_id, group_id, prompt, edition="basic", key=None):
+    """Look up a cached response
+    
+    Pass the key from get_cache_key() when the same request will also call
+    cache_set(), so the prompt is hashed only once.
+    """
     global cache_available
-    key = get_cache_key(org_id, group_id, prompt)
+    if key is None:
+        key = get_cache_key(org_id, group_id, prompt)
     try:
         result = r.get(key)
         cache_available = True  # Reset flag on success
+        # Only repr() the prompt when debug output is actually wanted
+        if logger.isEnabledFor(logging.DEBUG):
+            status = "HIT" if result else "MISS"
+            logger.debug(f"[CACHE GET] {status} key={key} org_id={org_id} group_id={group_id} prompt={prompt!r}")
         if result:
-            logger.debug(f"[CACHE GET] HIT key={key} org_id={org_id} group_id={group_id} prompt={prompt!r}")
             return json.loads(result)
-        else:
-            logger.debug(f"[CACHE GET] MISS key={key} org_id={org_id} group_id={group_id} prompt={prompt!r}")
         return None
     except Exception as e:
         cache_available = False
@@ -37,11 +49,13 @@ def cache_get(org_id, group_id, prompt, edition="basic"):
             logger.warning(msg)
         return None
 
-def cache_set(org_id, group_id, prompt, response, ttl=3600, edition="basic"):
+def cache_set(org_id, group_id, prompt, response, ttl=3600, edition="basic", key=None):
     global cache_available
-    key = get_cache_key(org_id, group_id, prompt)
+    if key is None:
+        key = get_cache_key(org_id, group_id, prompt)
     try:
-        logger.debug(f"[CACHE SET] key={key} org_id={org_id} group_id={group_id} prompt={prompt!r} ttl={ttl}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[CACHE SET] key={key} org_id={org_id} group_id={group_id} prompt={prompt!r} ttl={ttl}")
         r.set(key, json.dumps(response), ex=ttl)
         cache_available = True  # Reset flag on success
     except Exception as e:
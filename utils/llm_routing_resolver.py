@@ -9,6 +9,7 @@ import yaml
 import os
 from typing import List, Dict, Any, Optional
 from wag_tail_logger import logger
+from utils.yaml_loader import YAML_LOADER
 
 
 def resolve_fallback_chain(config: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -94,7 +95,7 @@ def load_and_resolve_routing_config(path: str = None) -> Dict[str, Any]:
         
     try:
         with open(path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=YAML_LOADER)
             
         # Resolve the fallback chain
         resolved_chain = resolve_fallback_chain(config)
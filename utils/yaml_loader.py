@@ -0,0 +1,10 @@
+# Copyright (c) 2025 Startoken Pty Ltd
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+PyYAML loader shared by everything that reads the gateway's YAML config files
+"""
+import yaml
+
+# libyaml-backed loader when PyYAML was built with it; same safe subset, much faster parsing
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
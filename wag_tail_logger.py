@@ -9,6 +9,8 @@ import warnings
 import traceback
 from logging.handlers import RotatingFileHandler
 
+from utils.yaml_loader import YAML_LOADER
+
 # === CONFIG ===
 CONFIG_PATH = "config/sys_config.yaml"
 DEFAULT_LOG_LEVEL = "INFO"
@@ -25,7 +27,7 @@ def get_log_config():
     if os.path.exists(CONFIG_PATH):
         try:
             with open(CONFIG_PATH, "r") as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=YAML_LOADER)
                 log_cfg = config.get("log", {})
                 log_level = log_cfg.get("log_level", DEFAULT_LOG_LEVEL).upper()
                 log_file = log_cfg.get("gateway_log", log_file)